@@ -1,14 +1,17 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, Header, Response
 from fastapi.responses import RedirectResponse
 from sqlmodel import Session, select, text
 from sqlalchemy import text as sql_text
-from app.core.db import get_session
+from app.core.db import get_session, insert_ignore
 from app.models import User
 from app.core.security import hash_password, verify_password, create_access_token, decode_token
 from app.core.config import settings
 from app.schemas.auth import RegisterIn, LoginIn, ProfileUpdate
 import secrets
 from app.services.email import send_email
+from app.services.rate_limit import take_token
+from app.services.user_cache import forget_user
 from typing import Optional
 from datetime import datetime
 
@@ -20,42 +23,48 @@ async def options_auth():
     """Handle CORS preflight for auth endpoints"""
     return {}
 
-@router.post("/register")
-async def register(data: RegisterIn, session: Session = Depends(get_session)):
-    existing = session.exec(select(User).where(User.email == data.email)).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="Email already registered")
-    token = secrets.token_urlsafe(32)
-    
+def _create_user(session: Session, data: RegisterIn, token: str) -> Optional[User]:
+    """Insert the new account, or None when the email is taken; blocking DB and bcrypt work"""
     from app.core.db import engine
     with engine.connect() as conn:
         result = conn.execute(sql_text("PRAGMA table_info(user)"))
         columns = [row[1] for row in result.fetchall()]
         has_is_active = 'is_active' in columns
     
+    values = {
+        "email": data.email,
+        "hashed_password": hash_password(data.password),
+        "is_verified": False,
+        "verification_token": token,
+        "created_at": datetime.utcnow()
+    }
     if has_is_active:
-        with engine.begin() as conn:
-            conn.execute(sql_text("""
-                INSERT INTO user (email, hashed_password, is_verified, verification_token, created_at, is_active, xp)
-                VALUES (:email, :hashed_password, :is_verified, :verification_token, :created_at, 1, 0)
-            """), {
-                "email": data.email,
-                "hashed_password": hash_password(data.password),
-                "is_verified": 0,  
-                "verification_token": token,
-                "created_at": datetime.utcnow()
-            })
-        user = session.exec(select(User).where(User.email == data.email)).first()
+        user_id = session.exec(sql_text("""
+            INSERT INTO user (email, hashed_password, is_verified, verification_token, created_at, is_active, xp)
+            VALUES (:email, :hashed_password, :is_verified, :verification_token, :created_at, 1, 0)
+            ON CONFLICT (email) DO NOTHING
+            RETURNING id
+        """), params=values).scalar()
     else:
-        user = User(
-            email=data.email,
-            hashed_password=hash_password(data.password),
-            is_verified=False,
-            verification_token=token,
-        )
-        session.add(user)
-        session.commit()
-        session.refresh(user)
+        user_id = session.exec(
+            insert_ignore(User.__table__)
+            .values(**values)
+            .on_conflict_do_nothing(index_elements=["email"])
+            .returning(User.id)
+        ).scalar()
+    
+    if user_id is None:
+        session.rollback()
+        return None
+    session.commit()
+    return session.get(User, user_id)
+
+@router.post("/register")
+async def register(data: RegisterIn, session: Session = Depends(get_session)):
+    token = secrets.token_urlsafe(32)
+    user = await asyncio.to_thread(_create_user, session, data, token)
+    if user is None:
+        raise HTTPException(status_code=400, detail="Email already registered")
     verify_url = f"{settings.BACKEND_BASE_URL}{settings.API_PREFIX}/auth/verify?token={token}"
     html = f"<p>Verify your email:</p><p><a href='{verify_url}'>{verify_url}</a></p>"
     try:
@@ -115,11 +124,24 @@ def _get_user_from_token(
         user_id = int(payload.get("sub"))
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
-    user = session.exec(select(User).where(User.id == user_id)).first()
+    user = session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
+class RateLimit:
+    """Dependency allowing each user `rate` calls to a route every `per` seconds, 429 beyond that"""
+
+    def __init__(self, route: str, rate: float, per: float):
+        self.route = route
+        self.rate = rate
+        self.per = per
+
+    def __call__(self, current_user: User = Depends(_get_user_from_token)) -> User:
+        if not take_token(f"rl:{self.route}:{current_user.id}", self.rate, self.per):
+            raise HTTPException(status_code=429, detail="Too many requests, slow down")
+        return current_user
+
 def _get_optional_user_from_token(
     session: Session = Depends(get_session),
     authorization: str | None = Header(default=None)
@@ -133,7 +155,7 @@ def _get_optional_user_from_token(
         user_id = int(payload.get("sub"))
     except Exception:
         return None
-    user = session.exec(select(User).where(User.id == user_id)).first()
+    user = session.get(User, user_id)
     return user
 
 @router.get("/me")
@@ -165,7 +187,7 @@ def update_profile(
     
     session.add(current_user)
     session.commit()
-    session.refresh(current_user)
+    forget_user(current_user.id)
     
     return {
         "id": current_user.id,
@@ -180,7 +202,7 @@ def update_profile(
 @router.get("/user/{user_id}")
 def get_user_profile(user_id: int, session: Session = Depends(get_session)):
     """Get user profile by ID (public endpoint)"""
-    user = session.exec(select(User).where(User.id == user_id)).first()
+    user = session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -1,17 +1,15 @@
 
-from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select, func
+from sqlmodel import Session, func
 
-from app.core.db import get_session
-from app.models import User, EventAttendee, Event
+from app.core.db import get_session, engine
+from app.models import User
 from app.api.version_one.auth import _get_user_from_token
 
 from app.services.gamification import (
     BadgeSystem,
-    EngagementPredictor,
     award_event_xp,
     award_xp_for_all_past_events,
 )
@@ -25,8 +23,14 @@ def award_xp_for_event(user_id: int, event_id: int, session: Session) -> int:
     return award_event_xp(user_id, event_id, session)
 
 
-def get_user_badge_level(user_id: int, session: Session) -> Optional[dict]:
-    return BadgeSystem.get_user_badge(user_id, session)
+def award_xp_for_event_task(user_id: int, event_id: int) -> None:
+    """Background-task variant of award_xp_for_event; opens its own session."""
+    with Session(engine) as session:
+        award_event_xp(user_id, event_id, session)
+
+
+def get_user_badge_level(user_id: int, session: Session, stats: Optional[dict] = None) -> Optional[dict]:
+    return BadgeSystem.get_user_badge(user_id, session, stats)
 
 
 @router.get("/user/{user_id}")
@@ -42,47 +46,13 @@ def get_user_badge(
             detail="User not found",
         )
 
-    badge_level = get_user_badge_level(user_id, session)
+    stats = BadgeSystem._stats(user_id, session)
+    badge_level = get_user_badge_level(user_id, session, stats)
     total_xp = user.xp or 0
 
-    now = datetime.now(timezone.utc)
-
-    attendee_events = session.exec(
-        select(Event)
-        .join(EventAttendee, Event.id == EventAttendee.event_id)
-        .where(EventAttendee.user_id == user_id)
-    ).all()
-    
-    created_events = session.exec(
-        select(Event)
-        .where(Event.created_by == user_id)
-    ).all()
-    
-    all_event_ids = set()
-    for event in attendee_events:
-        all_event_ids.add(event.id)
-    for event in created_events:
-        all_event_ids.add(event.id)
-    
-    past_events_count = 0
-    for event_id in all_event_ids:
-        event = session.get(Event, event_id)
-        if event:
-            starts_at = event.starts_at
-            if starts_at.tzinfo is None:
-                starts_at = starts_at.replace(tzinfo=timezone.utc)
-            ends_at = starts_at + timedelta(hours=event.duration)
-            if ends_at <= now:
-                past_events_count += 1
-    
-    events_attended = past_events_count
-
-    engagement_score = EngagementPredictor.calculate_engagement_score(
-        user_id, session
-    )
-    
-    from app.services.gamification import calculate_weekly_streak
-    weekly_streak = calculate_weekly_streak(user_id, session)
+    events_attended = stats["events_attended"]
+    engagement_score = stats["engagement"]
+    weekly_streak = stats["weekly_streak"]
 
     return {
         "user_id": user_id,
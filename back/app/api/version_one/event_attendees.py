@@ -1,11 +1,16 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select, func
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
 from app.core.db import get_session
-from app.models import Event, User, EventAttendee
-from datetime import datetime, timezone, timedelta
+from app.models import Event, User
+from datetime import datetime, timezone
 from app.api.version_one.auth import _get_user_from_token
-from app.api.version_one.badges import award_xp_for_event
+from app.api.version_one.events import (
+    _STMT_LEAVE, _STMT_JOIN_IF_SEAT, _STMT_SEATS_AND_MEMBERSHIP, _STMT_SEATS_TAKEN,
+    _list_attendees, _stream_attendee_details,
+)
+from app.services.event_cache import ATTENDEES_TTL_SECONDS, cached_response, invalidate_event_listings
 
 router = APIRouter(prefix="/events/{event_id}/attendees", tags=["events"])
 
@@ -15,51 +20,33 @@ def join_event(
     session: Session = Depends(get_session),
     current_user: User = Depends(_get_user_from_token)
 ):
-    evt = session.get(Event, event_id)
+    evt = session.get(Event, event_id, with_for_update=True)
     if not evt:
         raise HTTPException(status_code=404, detail="Event not found")
 
     now_utc = datetime.now(timezone.utc)
     starts_at = evt.starts_at.replace(tzinfo=timezone.utc) if evt.starts_at.tzinfo is None else evt.starts_at
-    ends_at = starts_at + timedelta(hours=evt.duration)
 
     if starts_at <= now_utc:
         raise HTTPException(status_code=400, detail="Event has already started")
 
-    already = session.exec(
-        select(EventAttendee)
-        .where(EventAttendee.event_id == event_id, EventAttendee.user_id == current_user.id)
-    ).first()
-
-    attendee_count = session.exec(
-        select(func.count()).select_from(EventAttendee).where(EventAttendee.event_id == event_id)
-    ).one()
-
-    
-    creator_in_attendee = session.exec(
-        select(EventAttendee)
-        .where(EventAttendee.event_id == event_id, EventAttendee.user_id == evt.created_by)
+    seat_params = {"eid": event_id, "creator": evt.created_by}
+    inserted = session.exec(
+        _STMT_JOIN_IF_SEAT,
+        params={**seat_params, "uid": current_user.id, "cap": evt.capacity or None, "joined_at": datetime.utcnow()},
     ).first()
-    if not creator_in_attendee:
-        attendee_count += 1
-
-    if already:
-        return {"success": True, "alreadyJoined": True, "attendee_count": attendee_count}
-
-    if evt.capacity and attendee_count >= evt.capacity:
-        raise HTTPException(status_code=409, detail="Event is full")
-
-    session.add(EventAttendee(event_id=event_id, user_id=current_user.id))
     session.commit()
 
-    attendee_count = session.exec(
-        select(func.count()).select_from(EventAttendee).where(EventAttendee.event_id == event_id)
-    ).one()
-    if not creator_in_attendee:
-        attendee_count += 1
+    if inserted is None:
+        attendee_count, already = session.exec(
+            _STMT_SEATS_AND_MEMBERSHIP, params={**seat_params, "uid": current_user.id}
+        ).one()
+        if already:
+            return {"success": True, "alreadyJoined": True, "attendee_count": attendee_count}
+        raise HTTPException(status_code=409, detail="Event is full")
 
-    if now_utc >= ends_at:
-        award_xp_for_event(current_user.id, event_id, session)
+    attendee_count = session.exec(_STMT_SEATS_TAKEN, params=seat_params).one()
+    invalidate_event_listings()
 
     return {"success": True, "attendee_count": attendee_count}
 
@@ -82,98 +69,38 @@ def leave_event(
             detail="You cannot leave an event that has already started"
         )
 
-    rec = session.exec(
-        select(EventAttendee)
-        .where(EventAttendee.event_id == event_id, EventAttendee.user_id == current_user.id)
-    ).first()
-
-    def get_attendee_count():
-        base = session.exec(
-            select(func.count()).select_from(EventAttendee).where(EventAttendee.event_id == event_id)
-        ).one()
-
-        creator_in_attendee = session.exec(
-            select(EventAttendee)
-            .where(EventAttendee.event_id == event_id, EventAttendee.user_id == evt.created_by)
-        ).first()
-
-        if not creator_in_attendee:
-            base += 1
+    seat_params = {"eid": event_id, "creator": evt.created_by}
+    removed = session.exec(
+        _STMT_LEAVE, params={"eid": event_id, "uid": current_user.id}
+    ).rowcount
+    session.commit()
 
-        return base
+    seats = session.exec(_STMT_SEATS_TAKEN, params=seat_params).one()
 
-    if not rec:
-        return {"success": True, "notJoined": True, "attendee_count": get_attendee_count()}
+    if not removed:
+        return {"success": True, "notJoined": True, "attendee_count": seats}
 
-    session.delete(rec)
-    session.commit()
+    invalidate_event_listings()
 
-    return {"success": True, "attendee_count": get_attendee_count()}
+    return {"success": True, "attendee_count": seats}
 
 @router.get("", response_model=List[int])
 def list_attendees(event_id: int, session: Session = Depends(get_session)):
-    evt = session.get(Event, event_id)
-    if not evt:
-        raise HTTPException(status_code=404, detail="Event not found")
-
-    
-    user_ids = session.exec(
-        select(EventAttendee.user_id).where(EventAttendee.event_id == event_id)
-    ).all()
-
-    user_ids = [uid for uid in user_ids]
-
-    
-    if evt.created_by not in user_ids:
-        user_ids.append(evt.created_by)
-
-    return user_ids
+    return cached_response(
+        "attendees", {"event_id": event_id}, ATTENDEES_TTL_SECONDS,
+        lambda: _list_attendees(session, event_id),
+    )
 
 
 @router.get("/details")
 def list_attendees_with_details(event_id: int, session: Session = Depends(get_session)):
-    """Get full attendee list with user details, including owner."""
+    """Get full attendee list with user details, including owner (streamed as a JSON array)."""
     
     evt = session.get(Event, event_id)
     if not evt:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    
-    attendee_records = session.exec(
-        select(EventAttendee)
-        .where(EventAttendee.event_id == event_id)
-        .order_by(EventAttendee.joined_at.asc())
-    ).all()
-
-    
-    joined_times = {a.user_id: a.joined_at for a in attendee_records}
-
-    
-    if evt.created_by not in joined_times:
-        
-        joined_times[evt.created_by] = evt.starts_at
-
-    user_ids = list(joined_times.keys())
-
-    
-    users = session.exec(select(User).where(User.id.in_(user_ids))).all()
-    user_map = {u.id: u for u in users}
-
-    
-    result = []
-    for user_id in user_ids:
-        u = user_map.get(user_id)
-        if u:
-            result.append({
-                "id": u.id,
-                "name": u.name,
-                "email": u.email,
-                "photo_url": u.photo_url,
-                "is_verified": u.is_verified,
-                "joined_at": joined_times[user_id].isoformat()
-            })
-
-    
-    result.sort(key=lambda x: x["joined_at"])
-
-    return result
+    return StreamingResponse(
+        _stream_attendee_details(event_id, evt.created_by, evt.starts_at),
+        media_type="application/json",
+    )
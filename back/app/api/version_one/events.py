@@ -1,47 +1,431 @@
-from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException, Query, Header, WebSocket, WebSocketDisconnect
-from sqlmodel import Session, select, func
-from app.core.db import get_session
+import asyncio
+import logging
+import orjson
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from anyio import from_thread
+from sqlmodel import Session, select, func, or_
+from sqlalchemy import Boolean, DateTime, Integer, String, and_, bindparam, case, cast, delete, exists, lambda_stmt, literal, tuple_
+from app.core.db import get_session, engine, insert_ignore
 from app.models import Event, User, EventAttendee, EventMessage, MessageRead
 
 from datetime import datetime, timezone, timedelta
 from app.schemas.events import EventCreate, EventRead, EventUpdate
-from app.api.version_one.auth import _get_user_from_token, _get_optional_user_from_token
+from app.api.version_one.auth import RateLimit, _get_user_from_token, _get_optional_user_from_token
 
-from app.api.version_one.badges import award_xp_for_event
-from app.services.ai import refine_text, generate_image
+from app.api.version_one.badges import award_xp_for_event_task
+from app.services.ai import refine_text, generate_image, get_openai_client
+from app.services.ai_jobs import submit_ai_job, get_ai_job, ai_cache_key
 from app.services.message_sync import MessageVersion, get_synchronizer
-
-from pydantic import BaseModel
+from app.services.event_cache import (
+    cached_response, invalidate_event_listings, LIST_EVENTS_TTL_SECONDS, AUTOCOMPLETE_TTL_SECONDS,
+    ATTENDEES_TTL_SECONDS,
+)
+from app.services.presence import clear_typing, sweep_presence, touch_presence, last_seen, online_user_ids, set_typing, typing_user_ids
+from app.services.user_cache import user_light
+
+from pydantic import BaseModel, Field
 from datetime import datetime, timezone
 
 from collections import defaultdict, Counter
+from uuid import uuid4
 from zoneinfo import ZoneInfo
 
+logger = logging.getLogger(__name__)
+
 
 
 
 router = APIRouter(prefix="/events", tags=["events"])
 
 
+_STMT_LEAVE = lambda_stmt(
+    lambda: delete(EventAttendee).where(
+        EventAttendee.event_id == bindparam("eid"),
+        EventAttendee.user_id == bindparam("uid"),
+    )
+)
+
+_STMT_EVENT_AND_MEMBERSHIP = lambda_stmt(
+    lambda: select(
+        Event,
+        exists().where(
+            EventAttendee.event_id == Event.id,
+            EventAttendee.user_id == bindparam("uid"),
+        ),
+    ).where(Event.id == bindparam("eid"))
+)
+
+_STMT_IS_ATTENDEE = lambda_stmt(
+    lambda: select(
+        exists().where(
+            EventAttendee.event_id == bindparam("eid"),
+            EventAttendee.user_id == bindparam("uid"),
+        )
+    )
+)
+
+_STMT_ATTENDEE_USER_IDS = lambda_stmt(
+    lambda: select(EventAttendee.user_id).where(EventAttendee.event_id == bindparam("eid"))
+)
+
+_STMT_EVENT_MEMBER_IDS = lambda_stmt(
+    lambda: select(Event.created_by, EventAttendee.user_id)
+    .outerjoin(EventAttendee, EventAttendee.event_id == Event.id)
+    .where(Event.id == bindparam("eid"))
+)
+
+_SEATS_TAKEN = (
+    select(func.count())
+    .select_from(EventAttendee)
+    .where(EventAttendee.event_id == bindparam("eid", type_=Integer))
+    .scalar_subquery()
+    + case(
+        (
+            exists().where(
+                EventAttendee.event_id == bindparam("eid", type_=Integer),
+                EventAttendee.user_id == bindparam("creator", type_=Integer),
+            ),
+            0,
+        ),
+        else_=1,
+    )
+)
+
+_STMT_SEATS_TAKEN = select(_SEATS_TAKEN)
+
+_STMT_SEATS_AND_MEMBERSHIP = select(
+    _SEATS_TAKEN,
+    exists().where(
+        EventAttendee.event_id == bindparam("eid", type_=Integer),
+        EventAttendee.user_id == bindparam("uid", type_=Integer),
+    ),
+)
+
+_STMT_JOIN_IF_SEAT = (
+    insert_ignore(EventAttendee.__table__)
+    .from_select(
+        ["event_id", "user_id", "joined_at", "xp_awarded"],
+        select(
+            bindparam("eid", type_=Integer),
+            bindparam("uid", type_=Integer),
+            bindparam("joined_at", type_=DateTime),
+            literal(False, Boolean),
+        ).where(
+            or_(bindparam("cap", type_=Integer).is_(None), _SEATS_TAKEN < bindparam("cap", type_=Integer))
+        )
+    )
+    .on_conflict_do_nothing(index_elements=["event_id", "user_id"])
+    .returning(EventAttendee.__table__.c.id)
+)
+
+_STMT_ATTENDEE_STATS_FOR_EVENTS = lambda_stmt(
+    lambda: select(
+        EventAttendee.event_id,
+        func.count(),
+        func.max(case((EventAttendee.user_id == Event.created_by, 1), else_=0)),
+        func.max(case((EventAttendee.user_id == bindparam("uid"), 1), else_=0)),
+    )
+    .join(Event, Event.id == EventAttendee.event_id)
+    .where(EventAttendee.event_id.in_(bindparam("eids", expanding=True)))
+    .group_by(EventAttendee.event_id)
+)
+
+_STMT_USERS_BY_IDS = lambda_stmt(
+    lambda: select(User.id, User.name, User.email, User.photo_url)
+    .where(User.id.in_(bindparam("uids", expanding=True)))
+)
+
+_STMT_MEMBER_SNIPPETS = lambda_stmt(
+    lambda: select(User.id, User.name, User.email, User.photo_url)
+    .where(
+        or_(
+            User.id == bindparam("owner"),
+            User.id.in_(
+                select(EventAttendee.user_id).where(EventAttendee.event_id == bindparam("eid"))
+            ),
+        )
+    )
+)
+
+_STMT_SOCKET_ACCESS = lambda_stmt(
+    lambda: select(
+        Event, User.id, User.name, User.email, User.photo_url, User.is_verified,
+        exists().where(
+            EventAttendee.event_id == Event.id,
+            EventAttendee.user_id == bindparam("uid"),
+        ),
+    )
+    .join(User, User.id == bindparam("uid"), isouter=True)
+    .where(Event.id == bindparam("eid"))
+)
+
+_STMT_RECENT_MESSAGE_ROWS_FOR_USER = lambda_stmt(
+    lambda: select(
+        EventMessage.id, EventMessage.content, EventMessage.is_deleted, EventMessage.created_at,
+        User.id, User.name, User.email, User.photo_url, User.is_verified, MessageRead.id,
+        EventMessage.user_id,
+    )
+    .join(User, User.id == EventMessage.user_id, isouter=True)
+    .join(
+        MessageRead,
+        and_(
+            MessageRead.message_id == EventMessage.id,
+            MessageRead.message_type == "event",
+            MessageRead.user_id == bindparam("uid"),
+        ),
+        isouter=True,
+    )
+    .where(EventMessage.event_id == bindparam("eid"))
+    .order_by(EventMessage.created_at.desc())
+    .limit(50)
+)
+
+_STMT_MESSAGE_ROWS_FOR_USER = lambda_stmt(
+    lambda: select(
+        EventMessage.id, EventMessage.content, EventMessage.is_deleted, EventMessage.created_at,
+        User.id, User.name, User.email, User.photo_url, User.is_verified, MessageRead.id,
+        EventMessage.user_id,
+    )
+    .join(User, User.id == EventMessage.user_id, isouter=True)
+    .join(
+        MessageRead,
+        and_(
+            MessageRead.message_id == EventMessage.id,
+            MessageRead.message_type == "event",
+            MessageRead.user_id == bindparam("uid"),
+        ),
+        isouter=True,
+    )
+    .where(EventMessage.id.in_(bindparam("mids", expanding=True)))
+)
+
+_STMT_MARK_READ = (
+    insert_ignore(MessageRead.__table__)
+    .values(message_id=bindparam("mid"), message_type="event", user_id=bindparam("uid"))
+    .on_conflict_do_nothing(index_elements=["message_id", "message_type", "user_id"])
+)
+
+_STMT_MARK_MANY_READ = (
+    insert_ignore(MessageRead.__table__)
+    .from_select(
+        ["message_id", "message_type", "user_id"],
+        select(EventMessage.id, literal("event"), bindparam("uid", type_=Integer))
+        .where(
+            EventMessage.event_id == bindparam("eid"),
+            EventMessage.id.in_(bindparam("mids", expanding=True)),
+        )
+    )
+    .on_conflict_do_nothing(index_elements=["message_id", "message_type", "user_id"])
+)
+
+
+
+OUTBOUND_QUEUE_SIZE = 256
+
+
+@dataclass
+class RoomConnection:
+    """One chat socket with its bounded outbox, drained in order by a single writer task"""
+    ws: WebSocket
+    user_id: int
+    outbox: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=OUTBOUND_QUEUE_SIZE))
+    writer: Optional[asyncio.Task] = None
+
+
+@dataclass
+class EventRoom:
+    """Per-event socket state: open connections and the presence ticker"""
+    conns: Dict[int, RoomConnection] = field(default_factory=dict)
+    ticker: Optional[asyncio.Task] = None
+
+
+rooms: Dict[int, EventRoom] = defaultdict(EventRoom)
+
+
+
+PRESENCE_TICK_SECONDS = 5  
+MAX_WS_FRAME_CHARS = 4096
+BROADCAST_SEND_TIMEOUT_SECONDS = 5.0
+DUPLICATE_MESSAGE_WINDOW_SECONDS = 1.0
+_last_message_hash: Dict[int, Tuple[int, float]] = {}
 
-typing_status: Dict[int, Dict[int, datetime]] = defaultdict(dict)
 
 
 
-user_presence: Dict[int, datetime] = {}
-PRESENCE_TIMEOUT_SECONDS = 300  
+ATTENDEE_STREAM_CHUNK_SIZE = 200
+MAX_PREFETCHED_MEMBERS = 200
+
+
+async def presence_ticker(event_id: int, room: EventRoom):
+    """Broadcast the event's online users to the whole room every PRESENCE_TICK_SECONDS"""
+    online_users, frame = None, None
+    while rooms.get(event_id) is room and room.conns:
+        await asyncio.sleep(PRESENCE_TICK_SECONDS)
+        current = online_user_ids(tuple(room.conns))
+        if current != online_users:
+            online_users = current
+            frame = _ws_dumps({"type": "presence_update", "online_users": online_users})
+        await broadcast_prepared(event_id, None, frame)
+
+
+STATE_SWEEP_SECONDS = 60
+
+
+async def state_sweeper():
+    """Periodically evict expired presence, typing and duplicate-message state for users who went quiet"""
+    while True:
+        await asyncio.sleep(STATE_SWEEP_SECONDS)
+        sweep_presence()
+        cutoff = time.monotonic() - DUPLICATE_MESSAGE_WINDOW_SECONDS
+        for uid in [uid for uid, (_, at) in _last_message_hash.items() if at < cutoff]:
+            del _last_message_hash[uid]
+
+
+_WS_JSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+
+class ChatJSONResponse(ORJSONResponse):
+    """orjson response that renders naive datetimes as UTC with a Z suffix, like the socket frames"""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=_WS_JSON_OPTIONS)
+
+
+_write_queue: Optional[asyncio.Queue] = None
+_db_writer_task: Optional[asyncio.Task] = None
+_read_queue: Optional[asyncio.Queue] = None
+_read_writer_task: Optional[asyncio.Task] = None
+
+READ_FLUSH_SECONDS = 0.05
+MAX_READ_BATCH = 500
+
+
+def _ws_dumps(payload) -> str:
+    return orjson.dumps(payload, option=_WS_JSON_OPTIONS).decode()
+
+
+def _message_payload(message_id, content: str, is_deleted: bool, created_at: datetime, user: Dict,
+                     is_read_by_me: bool = False, msg_version: Optional[MessageVersion] = None) -> Dict:
+    """A chat message as sent in socket frames and REST replies; vector clock fields only when versioned"""
+    payload = {
+        "id": message_id,
+        "content": content if not is_deleted else "",
+        "is_deleted": is_deleted,
+        "created_at": created_at,
+    }
+    if msg_version is not None:
+        payload["vector_clock"] = msg_version.vector_clock
+        payload["version"] = msg_version.version
+    payload["is_read_by_me"] = is_read_by_me
+    payload["user"] = user
+    return payload
+
+
+def _persist_event_message(event_id: int, user_id: int, content: str):
+    with Session(engine, expire_on_commit=False) as session:
+        message = EventMessage(
+            event_id=event_id,
+            user_id=user_id,
+            content=content
+        )
+        session.add(message)
+        session.commit()
+        return message
+
+
+async def db_writer():
+    """Persist queued chat messages in arrival order and confirm them to the event room"""
+    while True:
+        event_id, user_id, client_msg_id, content, user_snippet = await _write_queue.get()
+        try:
+            message = await asyncio.to_thread(_persist_event_message, event_id, user_id, content)
+        except Exception as e:
+            logger.warning("Error persisting message: %s", e)
+            await broadcast_to_event(event_id, None, {
+                "type": "message_failed",
+                "client_msg_id": client_msg_id
+            })
+            continue
+        
+        created_at = message.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        
+        synchronizer = get_synchronizer(str(event_id), "event")
+        msg_version = synchronizer.create_message_version(
+            message_id=message.id,
+            user_id=user_id,
+            content=content,
+            created_at=created_at
+        )
+        
+        await broadcast_to_event(event_id, None, {
+            "type": "message_confirmed",
+            "client_msg_id": client_msg_id,
+            "message": _message_payload(
+                message.id, message.content, False, message.created_at, user_snippet, msg_version=msg_version
+            )
+        })
+
+
+def _persist_reads(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Insert (message_id, user_id) read markers in one statement; returns the pairs that were new"""
+    stmt = (
+        insert_ignore(MessageRead.__table__)
+        .values([{"message_id": mid, "message_type": "event", "user_id": uid} for mid, uid in pairs])
+        .on_conflict_do_nothing(index_elements=["message_id", "message_type", "user_id"])
+        .returning(MessageRead.message_id, MessageRead.user_id)
+    )
+    with Session(engine) as session:
+        inserted = session.exec(stmt).all()
+        session.commit()
+    return [tuple(row) for row in inserted]
+
 
+async def read_writer():
+    """Collect socket read receipts for READ_FLUSH_SECONDS, store them in one insert, then broadcast the new ones"""
+    while True:
+        batch = {}
+        event_id, message_id, user_id = await _read_queue.get()
+        batch[(message_id, user_id)] = event_id
+        await asyncio.sleep(READ_FLUSH_SECONDS)
+        while len(batch) < MAX_READ_BATCH and not _read_queue.empty():
+            event_id, message_id, user_id = _read_queue.get_nowait()
+            batch[(message_id, user_id)] = event_id
+        
+        try:
+            inserted = await asyncio.to_thread(_persist_reads, list(batch))
+        except Exception as e:
+            logger.warning("Error marking messages as read: %s", e)
+            continue
+        
+        for message_id, user_id in inserted:
+            await broadcast_to_event(batch[(message_id, user_id)], user_id, {
+                "type": "message_read",
+                "message_id": message_id,
+                "user_id": user_id
+            })
 
-event_connections: Dict[int, Dict[int, WebSocket]] = {}
 
+def _ensure_read_writer():
+    """Start the read receipt writer task on the running loop if it is not already up"""
+    global _read_queue, _read_writer_task
+    loop = asyncio.get_running_loop()
+    if _read_writer_task is None or _read_writer_task.done() or _read_writer_task.get_loop() is not loop:
+        _read_queue = asyncio.Queue()
+        _read_writer_task = loop.create_task(read_writer())
 
-_main_event_loop = None
 
-def set_main_event_loop(loop):
-    """Set the main event loop reference"""
-    global _main_event_loop
-    _main_event_loop = loop
+def _ensure_db_writer():
+    """Start the chat writer task on the running loop if it is not already up"""
+    global _write_queue, _db_writer_task
+    loop = asyncio.get_running_loop()
+    if _db_writer_task is None or _db_writer_task.done() or _db_writer_task.get_loop() is not loop:
+        _write_queue = asyncio.Queue()
+        _db_writer_task = loop.create_task(db_writer())
 
 @router.post("", response_model=EventRead, status_code=201)
 def create_event(data: EventCreate, session: Session = Depends(get_session), current_user: User = Depends(_get_user_from_token)):
@@ -51,11 +435,10 @@ def create_event(data: EventCreate, session: Session = Depends(get_session), cur
 
     evt = Event(**payload, created_by=current_user.id)
     session.add(evt)
-    session.commit()
-    session.refresh(evt)
+    session.flush()
     session.add(EventAttendee(event_id=evt.id, user_id=current_user.id))
     session.commit()
-    session.refresh(evt)
+    invalidate_event_listings()
     
     
     now = datetime.now(timezone.utc)
@@ -101,9 +484,86 @@ def list_events(
     limit: int = 50,
     offset: int = 0,
     status: str = Query("upcoming"),
+    cursor: Optional[str] = None,
     current_user: Optional[User] = Depends(_get_optional_user_from_token),
 ):
-    query = select(Event)
+    """List events; page forward with ?cursor=<X-Next-Cursor> instead of a growing offset"""
+    after = _decode_keyset_cursor(cursor) if cursor else None
+    params = {
+        "q": q, "location": location, "exam": exam, "limit": limit, "offset": offset,
+        "status": status, "cursor": cursor, "user_id": current_user.id if current_user else None,
+    }
+    result, next_cursor = cached_response(
+        "list", params, LIST_EVENTS_TTL_SECONDS,
+        lambda: _list_events_page(session, q, location, exam, limit, offset, status, after, current_user),
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return ORJSONResponse(result, headers=headers)
+
+
+_EVENT_COLUMNS = tuple(Event.__table__.c)
+
+
+def _event_sort_key(status: str) -> str:
+    return "starts_at" if (status or "upcoming").lower() == "past" else "created_at"
+
+
+def _event_ends_at():
+    """starts_at + duration hours as a SQL expression for the configured dialect"""
+    if engine.dialect.name == "postgresql":
+        return Event.starts_at + func.make_interval(0, 0, 0, 0, Event.duration)
+    return func.datetime(Event.starts_at, "+" + cast(Event.duration, String) + " hours", type_=DateTime)
+
+
+def _encode_keyset_cursor(stamp: datetime, row_id: int) -> str:
+    if stamp.tzinfo is not None:
+        stamp = stamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return f"{stamp.strftime('%Y-%m-%dT%H:%M:%S.%f')}Z,{row_id}"
+
+
+def _decode_keyset_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        stamp, event_id = cursor.rsplit(",", 1)
+        value = datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+        event_id = int(event_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value, event_id
+
+
+def _list_events_page(
+    session: Session,
+    q: Optional[str],
+    location: Optional[str],
+    exam: Optional[str],
+    limit: int,
+    offset: int,
+    status: str,
+    after: Optional[Tuple[datetime, int]],
+    current_user: Optional[User],
+):
+    """One page of events plus the keyset cursor of its last row, or None on the last page"""
+    result = _list_events(session, q, location, exam, limit, offset, status, current_user, after)
+    if not result or len(result) < limit:
+        return result, None
+    last = result[-1]
+    return result, _encode_keyset_cursor(last[_event_sort_key(status)], last["id"])
+
+
+def _list_events(
+    session: Session,
+    q: Optional[str],
+    location: Optional[str],
+    exam: Optional[str],
+    limit: int,
+    offset: int,
+    status: str,
+    current_user: Optional[User],
+    after: Optional[Tuple[datetime, int]] = None,
+):
+    query = select(*_EVENT_COLUMNS)
     status = (status or "upcoming").lower()
     if status not in {"upcoming", "past", "ongoing", "all"}:
         raise HTTPException(status_code=400, detail="Invalid status filter")
@@ -134,59 +594,19 @@ def list_events(
         query = query.where(Event.starts_at > now_naive)
 
     elif status == "ongoing":
-        
-        
-        query = query.where(Event.starts_at <= now_naive)
+        query = query.where(Event.starts_at <= now_naive, _event_ends_at() > now_naive)
 
     elif status == "past":
         
-        
-        
-        
-        query = query.where(Event.starts_at < now_naive)
+        query = query.where(Event.starts_at < now_naive, _event_ends_at() <= now_naive)
 
     
-    if status == "past":
-        
-        query = query.order_by(Event.starts_at.desc())
-    else:
-        
-        query = query.order_by(Event.created_at.desc())
-    
-    
-    
-    
-    
-    fetch_limit = limit * 2 if status in ("past", "ongoing") else limit
-    query = query.limit(fetch_limit).offset(offset)
+    sort_column = getattr(Event, _event_sort_key(status))
+    if after is not None:
+        query = query.where(tuple_(sort_column, Event.id) < after)
+    query = query.order_by(sort_column.desc(), Event.id.desc())
+    query = query.limit(limit).offset(offset)
     events = session.exec(query).all()
-    
-    
-    
-    if events and (status == "ongoing" or status == "past"):
-        now_utc = datetime.now(timezone.utc)
-        if status == "ongoing":
-            
-            filtered_events = []
-            for e in events:
-                starts_at = e.starts_at.replace(tzinfo=timezone.utc) if e.starts_at.tzinfo is None else e.starts_at
-                ends_at = starts_at + timedelta(hours=e.duration)
-                if starts_at <= now_utc < ends_at:
-                    filtered_events.append(e)
-                    if len(filtered_events) >= limit:
-                        break
-            events = filtered_events
-        elif status == "past":
-            
-            filtered_events = []
-            for e in events:
-                starts_at = e.starts_at.replace(tzinfo=timezone.utc) if e.starts_at.tzinfo is None else e.starts_at
-                ends_at = starts_at + timedelta(hours=e.duration)
-                if ends_at <= now_utc:
-                    filtered_events.append(e)
-                    if len(filtered_events) >= limit:
-                        break
-            events = filtered_events
 
     
     
@@ -196,36 +616,7 @@ def list_events(
 
         if event_ids:
             
-            all_attendee_records = session.exec(
-                select(EventAttendee.event_id, EventAttendee.user_id)
-                .where(EventAttendee.event_id.in_(event_ids))
-            ).all()
-
-            
-            count_map = {}
-            joined_set = set()
-            creator_attendee_set = set()
-            
-            creator_ids = {e.id: e.created_by for e in events}
-            
-            for event_id, user_id in all_attendee_records:
-                
-                count_map[event_id] = count_map.get(event_id, 0) + 1
-                
-                if user_id == current_user.id:
-                    joined_set.add(event_id)
-                
-                if creator_ids.get(event_id) == user_id:
-                    creator_attendee_set.add((event_id, user_id))
-
-            
-            for event in events:
-                if event.id not in count_map:
-                    count_map[event.id] = 0
-                if event.created_by and (event.id, event.created_by) not in creator_attendee_set:
-                    count_map[event.id] += 1
-                if event.created_by and count_map[event.id] == 0:
-                    count_map[event.id] = 1
+            count_map, joined_set = _attendee_stats(session, events, current_user.id)
 
             
             now = datetime.now(timezone.utc)
@@ -236,9 +627,7 @@ def list_events(
                 if starts_at.tzinfo is None:
                     starts_at = starts_at.replace(tzinfo=timezone.utc)
                 
-                ends_at = event.ends_at
-                if ends_at.tzinfo is None:
-                    ends_at = ends_at.replace(tzinfo=timezone.utc)
+                ends_at = starts_at + timedelta(hours=event.duration)
                 
                 is_upcoming = now < starts_at
                 is_ongoing = starts_at <= now < ends_at
@@ -250,7 +639,7 @@ def list_events(
                     "upcoming"
                 )
                 
-                event_dict = event.model_dump()
+                event_dict = dict(event._mapping)
                 event_dict.update({
                     "ends_at": ends_at,
                     "is_past": is_past,
@@ -275,29 +664,7 @@ def list_events(
 
     if event_ids:
         
-        all_attendee_records = session.exec(
-            select(EventAttendee.event_id, EventAttendee.user_id)
-            .where(EventAttendee.event_id.in_(event_ids))
-        ).all()
-
-        
-        count_map = {}
-        creator_attendee_set = set()
-        creator_ids = {e.id: e.created_by for e in events}
-        
-        for event_id, user_id in all_attendee_records:
-            count_map[event_id] = count_map.get(event_id, 0) + 1
-            if creator_ids.get(event_id) == user_id:
-                creator_attendee_set.add((event_id, user_id))
-
-        
-        for event in events:
-            if event.id not in count_map:
-                count_map[event.id] = 0
-            if event.created_by and (event.id, event.created_by) not in creator_attendee_set:
-                count_map[event.id] += 1
-            if event.created_by and count_map[event.id] == 0:
-                count_map[event.id] = 1
+        count_map, _ = _attendee_stats(session, events, None)
 
         
         now = datetime.now(timezone.utc)
@@ -308,9 +675,7 @@ def list_events(
             if starts_at.tzinfo is None:
                 starts_at = starts_at.replace(tzinfo=timezone.utc)
             
-            ends_at = event.ends_at
-            if ends_at.tzinfo is None:
-                ends_at = ends_at.replace(tzinfo=timezone.utc)
+            ends_at = starts_at + timedelta(hours=event.duration)
             
             is_upcoming = now < starts_at
             is_ongoing = starts_at <= now < ends_at
@@ -322,7 +687,7 @@ def list_events(
                 "upcoming"
             )
             
-            event_dict = event.model_dump()
+            event_dict = dict(event._mapping)
             event_dict.update({
                 "ends_at": ends_at,
                 "is_past": is_past,
@@ -343,9 +708,7 @@ def list_events(
         if starts_at.tzinfo is None:
             starts_at = starts_at.replace(tzinfo=timezone.utc)
         
-        ends_at = event.ends_at
-        if ends_at.tzinfo is None:
-            ends_at = ends_at.replace(tzinfo=timezone.utc)
+        ends_at = starts_at + timedelta(hours=event.duration)
         
         is_upcoming = now < starts_at
         is_ongoing = starts_at <= now < ends_at
@@ -357,7 +720,7 @@ def list_events(
             "upcoming"
         )
         
-        event_dict = event.model_dump()
+        event_dict = dict(event._mapping)
         event_dict.update({
             "ends_at": ends_at,
             "is_past": is_past,
@@ -370,6 +733,25 @@ def list_events(
     return result
 
 
+def _attendee_stats(session: Session, events: List[Event], user_id: Optional[int]):
+    """Attendee counts (creator included) and the ids user_id has joined, from one GROUP BY"""
+    rows = session.exec(
+        _STMT_ATTENDEE_STATS_FOR_EVENTS, params={"eids": [e.id for e in events], "uid": user_id}
+    ).all()
+    stats = {event_id: (count, creator_in, joined) for event_id, count, creator_in, joined in rows}
+    
+    count_map = {}
+    joined_set = set()
+    for event in events:
+        count, creator_in, joined = stats.get(event.id, (0, 0, 0))
+        if event.created_by and not creator_in:
+            count += 1
+        count_map[event.id] = count
+        if joined:
+            joined_set.add(event.id)
+    return count_map, joined_set
+
+
 @router.get("/my-events/count")
 def get_my_events_count(
     session: Session = Depends(get_session),
@@ -377,62 +759,42 @@ def get_my_events_count(
     status: str = Query("upcoming")
 ):
     """Get count of events that the current user is attending or created (lightweight)"""
-    from sqlalchemy import or_
-    
     status = (status or "upcoming").lower()
     if status not in {"upcoming", "past", "ongoing", "all"}:
         raise HTTPException(status_code=400, detail="Invalid status filter")
     
     
-    attended_event_ids = session.exec(
-        select(EventAttendee.event_id).where(EventAttendee.user_id == current_user.id)
-    ).all()
-    
-    
-    if not attended_event_ids:
-        
-        query = select(Event).where(Event.created_by == current_user.id)
-    else:
-        
-        query = select(Event).where(
-            or_(
-                Event.id.in_(attended_event_ids),
-                Event.created_by == current_user.id
-            )
+    mine = or_(
+        Event.created_by == current_user.id,
+        Event.id.in_(
+            select(EventAttendee.event_id).where(EventAttendee.user_id == current_user.id)
         )
+    )
     
     
     now_utc = datetime.now(timezone.utc)
     now_naive = now_utc.replace(tzinfo=None)
     
     
-    if status == "upcoming":
-        query = query.where(Event.starts_at > now_naive)
-    elif status == "ongoing":
-        
-        query = query.where(Event.starts_at <= now_naive)
-    elif status == "past":
-        
-        query = query.where(Event.starts_at < now_naive)
-    
-    
-    events = session.exec(query).all()
+    if status in ("upcoming", "all"):
+        query = select(func.count()).select_from(Event).where(mine)
+        if status == "upcoming":
+            query = query.where(Event.starts_at > now_naive)
+        return {"count": session.exec(query).one()}
     
     
-    if status in ("ongoing", "past") and events:
-        filtered_events = []
-        for e in events:
-            starts_at = e.starts_at.replace(tzinfo=timezone.utc) if e.starts_at.tzinfo is None else e.starts_at
-            ends_at = starts_at + timedelta(hours=e.duration)
-            if status == "ongoing":
-                if starts_at <= now_utc < ends_at:
-                    filtered_events.append(e)
-            elif status == "past":
-                if ends_at <= now_utc:
-                    filtered_events.append(e)
-        events = filtered_events
+    rows = session.exec(
+        select(Event.starts_at, Event.duration).where(mine, Event.starts_at <= now_naive)
+    ).all()
     
-    count = len(events) if events else 0
+    count = 0
+    for starts_at, duration in rows:
+        starts_at = starts_at.replace(tzinfo=timezone.utc) if starts_at.tzinfo is None else starts_at
+        ends_at = starts_at + timedelta(hours=duration)
+        if status == "ongoing" and now_utc < ends_at:
+            count += 1
+        elif status == "past" and ends_at <= now_utc:
+            count += 1
     return {"count": count}
 
 @router.get("/my-events", response_model=List[EventRead])
@@ -444,29 +806,19 @@ def get_my_events(
     status: str = Query("upcoming")
 ):
     """Get events that the current user is attending or created (paginated)"""
-    from sqlalchemy import or_
-    
     status = (status or "upcoming").lower()
     if status not in {"upcoming", "past", "ongoing", "all"}:
         raise HTTPException(status_code=400, detail="Invalid status filter")
     
     
-    attended_event_ids = session.exec(
-        select(EventAttendee.event_id).where(EventAttendee.user_id == current_user.id)
-    ).all()
-    
-    
-    if not attended_event_ids:
-        
-        query = select(Event).where(Event.created_by == current_user.id)
-    else:
-        
-        query = select(Event).where(
-            or_(
-                Event.id.in_(attended_event_ids),
-                Event.created_by == current_user.id
+    query = select(Event).where(
+        or_(
+            Event.created_by == current_user.id,
+            Event.id.in_(
+                select(EventAttendee.event_id).where(EventAttendee.user_id == current_user.id)
             )
         )
+    )
     
     
     now_utc = datetime.now(timezone.utc)
@@ -547,16 +899,6 @@ def get_my_events(
                 count_map[event.id] = 1
 
         
-        user_joined = session.exec(
-            select(EventAttendee.event_id)
-            .where(
-                EventAttendee.event_id.in_(event_ids),
-                EventAttendee.user_id == current_user.id
-            )
-        ).all()
-        joined_set = set(user_joined)
-
-        
         now = datetime.now(timezone.utc)
         result = []
         for event in events:
@@ -587,10 +929,7 @@ def get_my_events(
                 "is_upcoming": is_upcoming,
                 "status": status,
                 "attendee_count": count_map.get(event.id, 0),
-                "is_joined": (
-                    event.created_by == current_user.id or
-                    event.id in joined_set
-                )
+                "is_joined": True
             })
             result.append(event_dict)
 
@@ -639,24 +978,30 @@ def autocomplete_events(
     session: Session = Depends(get_session)
 ):
     """Autocomplete events by title"""
-    query = select(Event.title, Event.id, Event.location).where(
-        Event.title.ilike(f"%{q}%")
-    ).limit(limit)
+    q = q.lower()
+
+    def compute():
+        query = select(Event.title, Event.id, Event.location).where(
+            Event.title.ilike(f"%{q}%")
+        ).limit(limit)
+        
+        events = session.exec(query).all()
+        return [
+            {
+                "id": event.id,
+                "title": event.title,
+                "location": event.location,
+                "full": f"{event.title} - {event.location}" if event.location else event.title
+            }
+            for event in events
+        ]
     
-    events = session.exec(query).all()
-    return [
-        {
-            "id": event.id,
-            "title": event.title,
-            "location": event.location,
-            "full": f"{event.title} - {event.location}" if event.location else event.title
-        }
-        for event in events
-    ]
+    return cached_response("autocomplete", {"q": q, "limit": limit}, AUTOCOMPLETE_TTL_SECONDS, compute)
 
 @router.get("/{event_id}", response_model=EventRead)
 def get_event(
     event_id: int, 
+    background: BackgroundTasks,
     session: Session = Depends(get_session),
     current_user: Optional[User] = Depends(_get_optional_user_from_token)
 ):
@@ -686,19 +1031,16 @@ def get_event(
     )
 
     
+    is_attendee = bool(current_user) and session.exec(
+        _STMT_IS_ATTENDEE, params={"eid": event_id, "uid": current_user.id}
+    ).scalar_one()
+    
     if current_user and is_past:
-        
-        is_attendee = session.exec(
-            select(EventAttendee).where(
-                EventAttendee.event_id == event_id,
-                EventAttendee.user_id == current_user.id
-            )
-        ).first()
         is_creator = evt.created_by == current_user.id
         
         if is_attendee or is_creator:
             
-            award_xp_for_event(current_user.id, event_id, session)
+            background.add_task(award_xp_for_event_task, current_user.id, event_id)
 
     
     data = evt.model_dump()
@@ -711,46 +1053,26 @@ def get_event(
     })
 
     
+    data["attendee_count"] = session.exec(
+        _STMT_SEATS_TAKEN, params={"eid": event_id, "creator": evt.created_by}
+    ).one()
+    
     if current_user:
-        
-        is_attendee = session.exec(
-            select(EventAttendee).where(
-                EventAttendee.event_id == event_id,
-                EventAttendee.user_id == current_user.id
-            )
-        ).first()
-        
-        
-        is_creator = evt.created_by == current_user.id
-        
-        
-        attendee_count = session.exec(
-            select(func.count()).select_from(EventAttendee).where(EventAttendee.event_id == event_id)
-        ).one()
-        
-        
-        if is_creator and not is_attendee:
-            attendee_count += 1
-        
-        data.update({
-            "is_joined": is_creator or bool(is_attendee),
-            "attendee_count": attendee_count,
-        })
-    else:
-        
-        attendee_count = session.exec(
-            select(func.count()).select_from(EventAttendee).where(EventAttendee.event_id == event_id)
-        ).one()
-        
-        if evt.created_by:
-            attendee_count += 1
-        data.update({
-            "attendee_count": attendee_count,
-        })
+        data["is_joined"] = evt.created_by == current_user.id or is_attendee
+        if data["is_joined"]:
+            
+            background.add_task(_prefetch_member_cards_task, event_id, evt.created_by)
 
     return data
 
 
+def _prefetch_member_cards_task(event_id: int, owner_id: int) -> None:
+    """Warm the user card cache for an event's members, which the chat's typing poll reads next"""
+    with Session(engine) as session:
+        user_ids = session.exec(_STMT_ATTENDEE_USER_IDS, params={"eid": event_id}).scalars().all()
+        user_light(session, [owner_id, *user_ids[:MAX_PREFETCHED_MEMBERS - 1]])
+
+
 
 @router.patch("/{event_id}", response_model=EventRead)
 def update_event(event_id: int, data: EventUpdate, session: Session = Depends(get_session), current_user: User = Depends(_get_user_from_token)):
@@ -773,7 +1095,7 @@ def update_event(event_id: int, data: EventUpdate, session: Session = Depends(ge
 
     session.add(evt)
     session.commit()
-    session.refresh(evt)
+    invalidate_event_listings()
 
     
     
@@ -817,17 +1139,26 @@ def delete_event(
     session: Session = Depends(get_session),
     current_user: User = Depends(_get_user_from_token)
 ):
-    evt = session.get(Event, event_id)
-    if not evt:
+    created_by = session.exec(select(Event.created_by).where(Event.id == event_id)).first()
+    if created_by is None:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    if evt.created_by != current_user.id:
+    if created_by != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed")
 
 
     
-    session.delete(evt)
+    event_message_ids = select(EventMessage.id).where(EventMessage.event_id == event_id)
+    for stmt in (
+        delete(MessageRead).where(MessageRead.message_type == "event", MessageRead.message_id.in_(event_message_ids)),
+        delete(EventMessage).where(EventMessage.event_id == event_id),
+        delete(EventAttendee).where(EventAttendee.event_id == event_id),
+        delete(Event).where(Event.id == event_id),
+    ):
+        session.exec(stmt.execution_options(synchronize_session=False))
     session.commit()
+    get_synchronizer(str(event_id), "event").invalidate()
+    invalidate_event_listings()
     return None
 
 @router.post("/{event_id}/join")
@@ -836,56 +1167,37 @@ def join_event(
     session: Session = Depends(get_session),
     current_user: User = Depends(_get_user_from_token)
 ):
-    evt = session.get(Event, event_id)
+    evt = session.get(Event, event_id, with_for_update=True)
     if not evt:
         raise HTTPException(status_code=404, detail="Event not found")
 
     now_utc = datetime.now(timezone.utc)
     starts_at = evt.starts_at.replace(tzinfo=timezone.utc) if evt.starts_at.tzinfo is None else evt.starts_at
-    ends_at = starts_at + timedelta(hours=evt.duration)
 
     if starts_at <= now_utc:
         raise HTTPException(status_code=400, detail="Event has already started")
 
     
-    already = session.exec(
-        select(EventAttendee)
-        .where(EventAttendee.event_id == event_id, EventAttendee.user_id == current_user.id)
+    seat_params = {"eid": event_id, "creator": evt.created_by}
+    inserted = session.exec(
+        _STMT_JOIN_IF_SEAT,
+        params={**seat_params, "uid": current_user.id, "cap": evt.capacity or None, "joined_at": datetime.utcnow()},
     ).first()
+    session.commit()
 
-    
-    attendee_count = session.exec(
-        select(func.count()).select_from(EventAttendee).where(EventAttendee.event_id == event_id)
-    ).one()
+    if inserted is None:
+        attendee_count, already = session.exec(
+            _STMT_SEATS_AND_MEMBERSHIP, params={**seat_params, "uid": current_user.id}
+        ).one()
+        if already:
+            return {"success": True, "alreadyJoined": True, "attendee_count": attendee_count}
+        raise HTTPException(status_code=409, detail="Event is full")
 
-    
-    creator_in_attendee = session.exec(
-        select(EventAttendee)
-        .where(EventAttendee.event_id == event_id, EventAttendee.user_id == evt.created_by)
-    ).first()
-    if not creator_in_attendee:
-        attendee_count += 1
+    attendee_count = session.exec(_STMT_SEATS_TAKEN, params=seat_params).one()
+    invalidate_event_listings()
 
-    if already:
-        return {"success": True, "alreadyJoined": True, "attendee_count": attendee_count}
-
-    
-    if evt.capacity and attendee_count >= evt.capacity:
-        raise HTTPException(status_code=409, detail="Event is full")
-
-    
-    session.add(EventAttendee(event_id=event_id, user_id=current_user.id))
-    session.commit()
-
-    
-    attendee_count = session.exec(
-        select(func.count()).select_from(EventAttendee).where(EventAttendee.event_id == event_id)
-    ).one()
-    if not creator_in_attendee:
-        attendee_count += 1
-
-    
-    user_presence[current_user.id] = now_utc
+    
+    touch_presence(current_user.id)
 
     
     
@@ -904,7 +1216,6 @@ def leave_event(
 
     now_utc = datetime.now(timezone.utc)
     starts_at = evt.starts_at.replace(tzinfo=timezone.utc) if evt.starts_at.tzinfo is None else evt.starts_at
-    ends_at = starts_at + timedelta(hours=evt.duration)
 
     if now_utc >= starts_at:
         raise HTTPException(
@@ -913,215 +1224,230 @@ def leave_event(
         )
 
     
-    rec = session.exec(
-        select(EventAttendee)
-        .where(EventAttendee.event_id == event_id, EventAttendee.user_id == current_user.id)
-    ).first()
-
-    
-    def get_attendee_count():
-        base = session.exec(
-            select(func.count()).select_from(EventAttendee).where(EventAttendee.event_id == event_id)
-        ).one()
-
-        creator_in_attendee = session.exec(
-            select(EventAttendee)
-            .where(EventAttendee.event_id == event_id, EventAttendee.user_id == evt.created_by)
-        ).first()
+    seat_params = {"eid": event_id, "creator": evt.created_by}
+    removed = session.exec(
+        _STMT_LEAVE, params={"eid": event_id, "uid": current_user.id}
+    ).rowcount
+    session.commit()
 
-        
-        if not creator_in_attendee:
-            base += 1
+    seats = session.exec(_STMT_SEATS_TAKEN, params=seat_params).one()
 
-        return base
+    if not removed:
+        return {"success": True, "notJoined": True, "attendee_count": seats}
 
-    
-    if not rec:
-        return {"success": True, "notJoined": True, "attendee_count": get_attendee_count()}
-
-    
-    session.delete(rec)
-    session.commit()
+    invalidate_event_listings()
 
-    return {"success": True, "attendee_count": get_attendee_count()}
+    return {"success": True, "attendee_count": seats}
 
 @router.get("/{event_id}/attendees", response_model=List[int])
 def list_attendees(event_id: int, session: Session = Depends(get_session)):
-    evt = session.get(Event, event_id)
-    if not evt:
+    return cached_response(
+        "attendees", {"event_id": event_id}, ATTENDEES_TTL_SECONDS,
+        lambda: _list_attendees(session, event_id),
+    )
+
+
+def _list_attendees(session: Session, event_id: int) -> List[int]:
+    rows = session.exec(_STMT_EVENT_MEMBER_IDS, params={"eid": event_id}).all()
+    if not rows:
         raise HTTPException(status_code=404, detail="Event not found")
 
     
-    user_ids = session.exec(
-        select(EventAttendee.user_id).where(EventAttendee.event_id == event_id)
-    ).all()
-
-    user_ids = [uid for uid in user_ids]
+    created_by = rows[0][0]
+    user_ids = [user_id for _, user_id in rows if user_id is not None]
 
     
-    if evt.created_by not in user_ids:
-        user_ids.append(evt.created_by)
+    if created_by not in user_ids:
+        user_ids.append(created_by)
 
     return user_ids
 
 
 @router.get("/{event_id}/attendees/details")
 def list_attendees_with_details(event_id: int, session: Session = Depends(get_session)):
-    """Get full attendee list with user details, including owner."""
+    """Get full attendee list with user details, including owner (streamed as a JSON array)."""
     
     evt = session.get(Event, event_id)
     if not evt:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    
-    attendee_records = session.exec(
-        select(EventAttendee)
-        .where(EventAttendee.event_id == event_id)
-        .order_by(EventAttendee.joined_at.asc())
-    ).all()
+    return StreamingResponse(
+        _stream_attendee_details(event_id, evt.created_by, evt.starts_at),
+        media_type="application/json",
+    )
 
-    
-    joined_times = {a.user_id: a.joined_at for a in attendee_records}
 
-    
-    if evt.created_by not in joined_times:
-        
-        joined_times[evt.created_by] = evt.starts_at
+@router.get("/{event_id}/detail")
+def get_event_detail(
+    event_id: int,
+    background: BackgroundTasks,
+    session: Session = Depends(get_session),
+    current_user: Optional[User] = Depends(_get_optional_user_from_token)
+):
+    """Event and its attendee details in one response, so the event page needs a single request"""
+    data = get_event(event_id, background, session, current_user)
+    event_json = orjson.dumps(EventRead.model_validate(data).model_dump(mode="json")).decode()
 
-    user_ids = list(joined_times.keys())
+    def body():
+        yield '{"event":' + event_json + ',"attendees":'
+        yield from _stream_attendee_details(event_id, data["created_by"], data["starts_at"])
+        yield "}"
 
-    
-    users = session.exec(select(User).where(User.id.in_(user_ids))).all()
-    user_map = {u.id: u for u in users}
+    return StreamingResponse(body(), media_type="application/json")
 
-    
-    result = []
-    for user_id in user_ids:
-        u = user_map.get(user_id)
-        if u:
-            result.append({
-                "id": u.id,
-                "name": u.name,
-                "email": u.email,
-                "photo_url": u.photo_url,
-                "is_verified": u.is_verified,
-                "joined_at": joined_times[user_id].isoformat()
-            })
 
-    
-    result.sort(key=lambda x: x["joined_at"])
+_USER_SNIPPET_COLUMNS = (User.id, User.name, User.email, User.photo_url, User.is_verified)
 
-    return result
+
+def _attendee_detail_json(user, joined_at: datetime) -> str:
+    return orjson.dumps({
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "photo_url": user.photo_url,
+        "is_verified": user.is_verified,
+        "joined_at": joined_at
+    }, option=_WS_JSON_OPTIONS).decode()
 
 
-@router.get("/{event_id}/messages")
+def _stream_attendee_details(event_id: int, owner_id: Optional[int], owner_joined_at: datetime):
+    """Yield the attendee list chunk by chunk from a single JOIN, ordered by joined_at."""
+    with Session(engine) as session:
+        
+        owner = None
+        if owner_id is not None:
+            owner_is_attendee = session.exec(
+                _STMT_IS_ATTENDEE, params={"eid": event_id, "uid": owner_id}
+            ).scalar_one()
+            if not owner_is_attendee:
+                owner = session.exec(
+                    select(*_USER_SNIPPET_COLUMNS).where(User.id == owner_id)
+                ).first()
+        owner_sort_key = owner_joined_at.replace(tzinfo=None) if owner_joined_at.tzinfo else owner_joined_at
+
+        rows = session.exec(
+            select(EventAttendee.joined_at, *_USER_SNIPPET_COLUMNS)
+            .join(User, User.id == EventAttendee.user_id)
+            .where(EventAttendee.event_id == event_id)
+            .order_by(EventAttendee.joined_at.asc())
+            .execution_options(yield_per=ATTENDEE_STREAM_CHUNK_SIZE)
+        )
+
+        yield "["
+        sep = ""
+        for user in rows:
+            joined_at = user.joined_at
+            
+            if owner is not None and owner_sort_key < (joined_at.replace(tzinfo=None) if joined_at.tzinfo else joined_at):
+                yield sep + _attendee_detail_json(owner, owner_joined_at)
+                sep = ","
+                owner = None
+            yield sep + _attendee_detail_json(user, joined_at)
+            sep = ","
+        if owner is not None:
+            yield sep + _attendee_detail_json(owner, owner_joined_at)
+        yield "]"
+
+
+@router.get("/{event_id}/messages", response_class=ChatJSONResponse)
 def get_event_messages(
     event_id: int, 
     session: Session = Depends(get_session), 
     current_user: Optional[User] = Depends(_get_optional_user_from_token),
     limit: int = Query(100, ge=1, le=500),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    before: Optional[str] = Query(None)
 ):
-    """Get messages for an event (paginated, most recent first)"""
+    """Get the newest messages for an event, oldest first; page back with ?before=<X-Next-Cursor>"""
     evt = session.get(Event, event_id)
     if not evt:
         raise HTTPException(status_code=404, detail="Event not found")
     
     
-    messages = session.exec(
-        select(EventMessage)
-        .where(EventMessage.event_id == event_id)
-        .order_by(EventMessage.created_at.desc())
+    page_filter = EventMessage.event_id == event_id
+    if before:
+        page_filter = and_(
+            page_filter, tuple_(EventMessage.created_at, EventMessage.id) < _decode_keyset_cursor(before)
+        )
+    
+    read_count = (
+        select(func.count())
+        .where(MessageRead.message_id == EventMessage.id, MessageRead.message_type == "event")
+        .correlate(EventMessage)
+        .scalar_subquery()
+    )
+    read_by_me = (
+        select(MessageRead.id)
+        .where(
+            MessageRead.message_id == EventMessage.id,
+            MessageRead.message_type == "event",
+            MessageRead.user_id == (current_user.id if current_user else None)
+        )
+        .correlate(EventMessage)
+        .exists()
+    )
+    rows = session.exec(
+        select(
+            EventMessage.id, EventMessage.content, EventMessage.is_deleted, EventMessage.created_at,
+            User.id, User.name, User.email, User.photo_url, User.is_verified,
+            read_count, read_by_me,
+        )
+        .join(User, User.id == EventMessage.user_id)
+        .where(page_filter)
+        .order_by(EventMessage.created_at.desc(), EventMessage.id.desc())
         .limit(limit)
         .offset(offset)
     ).all()
     
     
-    messages = list(reversed(messages))
-    
-    if not messages:
-        return []
-    
-    user_ids = [msg.user_id for msg in messages]
-    users = session.exec(select(User).where(User.id.in_(user_ids))).all()
-    user_map = {u.id: u for u in users}
-    
-    
-    message_ids = [msg.id for msg in messages]
-    read_records = session.exec(
-        select(MessageRead).where(
-            MessageRead.message_id.in_(message_ids),
-            MessageRead.message_type == "event"
-        )
-    ).all()
-    read_map = {}  
-    for read in read_records:
-        if read.message_id not in read_map:
-            read_map[read.message_id] = []
-        read_map[read.message_id].append(read.user_id)
-    
     result = []
-    for msg in messages:
-        user = user_map.get(msg.user_id)
-        if user:
-            
-            created_at_str = msg.created_at.isoformat()
-            if msg.created_at.tzinfo is None:
-                
-                created_at_str = msg.created_at.replace(tzinfo=timezone.utc).isoformat()
-            if not created_at_str.endswith('Z') and msg.created_at.tzinfo == timezone.utc:
-                created_at_str = created_at_str.replace('+00:00', 'Z')
-            
-            
-            read_by = read_map.get(msg.id, [])
-            read_count = len(read_by)
-            is_read_by_current_user = current_user and current_user.id in read_by if current_user else False
-            
-            result.append({
-                "id": msg.id,
-                "content": msg.content if not msg.is_deleted else None,
-                "is_deleted": msg.is_deleted,
-                "created_at": created_at_str,
-                "read_count": read_count,
-                "is_read_by_me": is_read_by_current_user,
-                "user": {
-                    "id": user.id,
-                    "name": user.name,
-                    "email": user.email,
-                    "photo_url": user.photo_url,
-                    "is_verified": user.is_verified
-                }
-            })
+    for (msg_id, content, is_deleted, created_at,
+         user_id, user_name, user_email, user_photo_url, user_is_verified,
+         msg_read_count, is_read_by_current_user) in reversed(rows):
+        result.append({
+            "id": msg_id,
+            "content": content if not is_deleted else None,
+            "is_deleted": is_deleted,
+            "created_at": created_at,
+            "read_count": msg_read_count,
+            "is_read_by_me": bool(is_read_by_current_user),
+            "user": {
+                "id": user_id,
+                "name": user_name,
+                "email": user_email,
+                "photo_url": user_photo_url,
+                "is_verified": user_is_verified
+            }
+        })
     
-    return result
+    headers = {}
+    if len(rows) == limit:
+        headers["X-Next-Cursor"] = _encode_keyset_cursor(rows[-1][3], rows[-1][0])
+    return ChatJSONResponse(result, headers=headers)
 
 @router.post("/{event_id}/messages")
 def post_event_message(
     event_id: int,
     content: str = Query(..., min_length=1, max_length=1000),
     session: Session = Depends(get_session),
-    current_user: User = Depends(_get_user_from_token)
+    current_user: User = Depends(RateLimit("messages", 2, 1))
 ):
     """Post a message to an event chat"""
-    evt = session.get(Event, event_id)
-    if not evt:
+    row = session.exec(
+        _STMT_EVENT_AND_MEMBERSHIP, params={"eid": event_id, "uid": current_user.id}
+    ).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Event not found")
+    evt, is_attendee = row
     
     
-    is_attendee = session.exec(
-        select(EventAttendee).where(
-            EventAttendee.event_id == event_id,
-            EventAttendee.user_id == current_user.id
-        )
-    ).first()
+    is_member = evt.created_by == current_user.id or is_attendee
     
-    is_owner = evt.created_by == current_user.id
-    
-    if not is_attendee and not is_owner:
+    if not is_member:
         raise HTTPException(status_code=403, detail="You must be an attendee or event organizer to post messages")
     
     
-    user_presence[current_user.id] = datetime.now(timezone.utc)
+    touch_presence(current_user.id)
     
     message = EventMessage(
         event_id=event_id,
@@ -1130,28 +1456,24 @@ def post_event_message(
     )
     session.add(message)
     session.commit()
-    session.refresh(message)
+    get_synchronizer(str(event_id), "event").invalidate()
     
     
-    created_at_str = message.created_at.isoformat()
-    if message.created_at.tzinfo is None:
-        
-        created_at_str = message.created_at.replace(tzinfo=timezone.utc).isoformat()
-    if not created_at_str.endswith('Z') and message.created_at.tzinfo == timezone.utc:
-        created_at_str = created_at_str.replace('+00:00', 'Z')
-    
-    return {
-        "id": message.id,
-        "content": message.content,
-        "created_at": created_at_str,
-        "user": {
-            "id": current_user.id,
-            "name": current_user.name,
-            "email": current_user.email,
-            "photo_url": current_user.photo_url,
-            "is_verified": current_user.is_verified
-        }
-    }
+    body = orjson.dumps(_message_payload(message.id, message.content, False, message.created_at, {
+        "id": current_user.id,
+        "name": current_user.name,
+        "email": current_user.email,
+        "photo_url": current_user.photo_url,
+        "is_verified": current_user.is_verified
+    }), option=_WS_JSON_OPTIONS)
+    
+    try:
+        frame = b'{"type":"new_message","message":' + body + b"}"
+        from_thread.run(broadcast_prepared, event_id, current_user.id, frame.decode())
+    except Exception as e:
+        logger.exception("Failed to broadcast message: %s", e)
+    
+    return Response(content=body, media_type="application/json")
 
 @router.delete("/{event_id}/messages/{message_id}")
 def delete_event_message(
@@ -1181,46 +1503,16 @@ def delete_event_message(
     message.content = ""  
     session.add(message)
     session.commit()
-    session.refresh(message)
-    
-    
-    import asyncio
-    import threading
-    
-    def schedule_broadcast():
-        """Schedule broadcast in the main event loop"""
-        global _main_event_loop
-        try:
-            loop = _main_event_loop
-            if loop is None:
-                
-                try:
-                    loop = asyncio.get_running_loop()
-                except RuntimeError:
-                    loop = asyncio.get_event_loop()
-            
-            if loop and loop.is_running():
-                
-                asyncio.run_coroutine_threadsafe(
-                    broadcast_to_event(event_id, None, {
-                        "type": "message_deleted",
-                        "message_id": message_id
-                    }),
-                    loop
-                )
-            elif loop:
-                
-                loop.run_until_complete(broadcast_to_event(event_id, None, {
-                    "type": "message_deleted",
-                    "message_id": message_id
-                }))
-        except Exception as e:
-            print(f"Failed to broadcast message deletion: {e}")
-            import traceback
-            traceback.print_exc()
+    get_synchronizer(str(event_id), "event").invalidate()
     
     
-    threading.Thread(target=schedule_broadcast, daemon=True).start()
+    try:
+        from_thread.run(broadcast_to_event, event_id, None, {
+            "type": "message_deleted",
+            "message_id": message_id
+        })
+    except Exception as e:
+        logger.exception("Failed to broadcast message deletion: %s", e)
     
     return {"message": "Message deleted successfully"}
 
@@ -1228,79 +1520,59 @@ def delete_event_message(
 def set_typing_status(
     event_id: int,
     session: Session = Depends(get_session),
-    current_user: User = Depends(_get_user_from_token)
+    current_user: User = Depends(RateLimit("typing", 10, 1))
 ):
     """Indicate that the current user is typing in the event chat"""
-    evt = session.get(Event, event_id)
-    if not evt:
+    row = session.exec(
+        _STMT_EVENT_AND_MEMBERSHIP, params={"eid": event_id, "uid": current_user.id}
+    ).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Event not found")
+    evt, is_attendee = row
     
     
-    is_attendee = session.exec(
-        select(EventAttendee).where(
-            EventAttendee.event_id == event_id,
-            EventAttendee.user_id == current_user.id
-        )
-    ).first()
-    
-    is_owner = evt.created_by == current_user.id
+    is_member = evt.created_by == current_user.id or is_attendee
     
-    if not is_attendee and not is_owner:
+    if not is_member:
         raise HTTPException(status_code=403, detail="You must be an attendee or event organizer")
     
     
-    typing_status[event_id][current_user.id] = datetime.now(timezone.utc)
+    set_typing(event_id, current_user.id)
     
     
-    user_presence[current_user.id] = datetime.now(timezone.utc)
+    touch_presence(current_user.id)
     
     return {"status": "typing"}
 
-@router.get("/{event_id}/typing")
+@router.get("/{event_id}/typing", response_class=ChatJSONResponse)
 def get_typing_status(
     event_id: int,
     session: Session = Depends(get_session),
     current_user: Optional[User] = Depends(_get_user_from_token)
 ):
     """Get list of users currently typing in the event chat"""
-    evt = session.get(Event, event_id)
-    if not evt:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    
-    now = datetime.now(timezone.utc)
-    expired_users = []
-    if event_id in typing_status:
-        for user_id, last_typing in list(typing_status[event_id].items()):
-            if (now - last_typing).total_seconds() > 3:
-                expired_users.append(user_id)
-        for user_id in expired_users:
-            del typing_status[event_id][user_id]
-    
-    
-    typing_user_ids = [
-        uid for uid in typing_status.get(event_id, {}).keys()
+    typing_ids = [
+        uid for uid in typing_user_ids(event_id)
         if current_user is None or uid != current_user.id
     ]
     
-    if not typing_user_ids:
-        return {"typing_users": []}
+    if not typing_ids:
+        if not session.get(Event, event_id):
+            raise HTTPException(status_code=404, detail="Event not found")
+        return ChatJSONResponse({"typing_users": []})
     
     
-    users = session.exec(select(User).where(User.id.in_(typing_user_ids))).all()
+    users = user_light(session, typing_ids)
     
-    return {
+    return ChatJSONResponse({
         "typing_users": [
-            {
-                "id": user.id,
-                "name": user.name or user.email,
-                "photo_url": user.photo_url
-            }
-            for user in users
+            {"id": uid, "name": users[uid][0], "photo_url": users[uid][1]}
+            for uid in typing_ids
+            if uid in users
         ]
-    }
+    })
 
-@router.get("/{event_id}/presence")
+@router.get("/{event_id}/presence", response_class=ChatJSONResponse)
 def get_event_presence(
     event_id: int,
     session: Session = Depends(get_session),
@@ -1312,48 +1584,30 @@ def get_event_presence(
         raise HTTPException(status_code=404, detail="Event not found")
     
     
-    attendees = session.exec(
-        select(EventAttendee).where(EventAttendee.event_id == event_id)
+    users = session.exec(
+        _STMT_MEMBER_SNIPPETS, params={"eid": event_id, "owner": evt.created_by}
     ).all()
     
     
-    attendee_user_ids = [a.user_id for a in attendees]
-    if evt.created_by not in attendee_user_ids:
-        attendee_user_ids.append(evt.created_by)
-    
+    if current_user and any(user.id == current_user.id for user in users):
+        touch_presence(current_user.id)
     
-    if current_user and current_user.id in attendee_user_ids:
-        user_presence[current_user.id] = datetime.now(timezone.utc)
-    
-    if not attendee_user_ids:
-        return {"presence": []}
-    
-    
-    now = datetime.now(timezone.utc)
-    expired_users = [
-        uid for uid, last_activity in user_presence.items()
-        if (now - last_activity).total_seconds() > PRESENCE_TIMEOUT_SECONDS
-    ]
-    for uid in expired_users:
-        del user_presence[uid]
-    
-    
-    users = session.exec(select(User).where(User.id.in_(attendee_user_ids))).all()
+    seen = last_seen([user.id for user in users])
     
     result = []
     for user in users:
-        last_activity = user_presence.get(user.id)
-        is_online = last_activity and (now - last_activity).total_seconds() <= PRESENCE_TIMEOUT_SECONDS
+        last_activity = seen.get(user.id)
+        is_online = last_activity is not None
         
         result.append({
             "id": user.id,
             "name": user.name or user.email,
             "photo_url": user.photo_url,
             "is_online": is_online,
-            "last_seen": last_activity.isoformat() if last_activity else None
+            "last_seen": last_activity
         })
     
-    return {"presence": result}
+    return ChatJSONResponse({"presence": result})
 
 @router.post("/{event_id}/messages/{message_id}/read")
 def mark_event_message_read(
@@ -1372,24 +1626,36 @@ def mark_event_message_read(
         raise HTTPException(status_code=404, detail="Message not found")
     
     
-    existing_read = session.exec(
-        select(MessageRead).where(
-            MessageRead.message_id == message_id,
-            MessageRead.message_type == "event",
-            MessageRead.user_id == current_user.id
-        )
-    ).first()
+    session.exec(
+        _STMT_MARK_READ, params={"mid": message_id, "uid": current_user.id}
+    )
+    session.commit()
+    
+    return {"status": "read"}
+
+class MarkReadRequest(BaseModel):
+    message_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+@router.post("/{event_id}/messages/read")
+def mark_event_messages_read(
+    event_id: int,
+    data: MarkReadRequest,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(_get_user_from_token)
+):
+    """Mark several messages as read by the current user in one statement"""
+    evt = session.get(Event, event_id)
+    if not evt:
+        raise HTTPException(status_code=404, detail="Event not found")
     
-    if not existing_read:
-        read_record = MessageRead(
-            message_id=message_id,
-            message_type="event",
-            user_id=current_user.id
-        )
-        session.add(read_record)
-        session.commit()
     
-        return {"status": "read"}
+    session.exec(
+        _STMT_MARK_MANY_READ,
+        params={"eid": event_id, "uid": current_user.id, "mids": data.message_ids}
+    )
+    session.commit()
+    
+    return {"status": "read"}
 
 class TextRefinementRequest(BaseModel):
     text: str
@@ -1399,34 +1665,31 @@ class TextRefinementRequest(BaseModel):
 @router.post("/refine-text")
 async def refine_event_text(
     request: TextRefinementRequest,
-    authorization: Optional[str] = Header(default=None),
-    session: Session = Depends(get_session),
     current_user: User = Depends(_get_user_from_token)
 ):
     """
-    Refine and polish user-written text for events.
+    Queue an AI refinement of user-written event text; poll /events/ai-jobs/{job_id} for the result.
     """
     if not request.text or not request.text.strip():
         raise HTTPException(status_code=400, detail="Text cannot be empty")
 
     try:
-        refined = await refine_text(
-            text=request.text.strip(),
-            context=None,
-            field_type=request.field_type,
-        )
-        return {"refined_text": refined}
-
+        get_openai_client()
     except ValueError as e:
         raise HTTPException(
             status_code=500,
             detail=f"AI service configuration error: {str(e)}",
         )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to refine text: {str(e)}",
-        )
+
+    text = request.text.strip()
+    field_type = request.field_type
+
+    async def work():
+        refined = await refine_text(text=text, context=None, field_type=field_type)
+        return {"refined_text": refined}
+
+    job_id = submit_ai_job(current_user.id, work)
+    return {"job_id": job_id, "status": "pending"}
 
 
 class ImageGenerationRequest(BaseModel):
@@ -1440,36 +1703,132 @@ async def options_generate_image():
 @router.post("/generate-image")
 async def generate_cover_image(
     request: ImageGenerationRequest,
-    session: Session = Depends(get_session),
     current_user: User = Depends(_get_user_from_token)
 ):
     """
-    Generate a cover image from a text prompt using AI.
-    Returns a base64-encoded image data URL.
+    Queue AI cover image generation from a text prompt; poll /events/ai-jobs/{job_id} for the
+    base64-encoded image data URL.
     """
-    try:
-        if not request.prompt or not request.prompt.strip():
-            raise HTTPException(status_code=400, detail="Prompt cannot be empty")
-        
-        image_data_url = await generate_image(request.prompt.strip())
+    if not request.prompt or not request.prompt.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+    prompt = request.prompt.strip()
+
+    async def work():
+        image_data_url = await generate_image(prompt)
         return {"image_url": image_data_url}
-    except Exception as e:
-        print(f"Image generation error: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate image: {str(e)}")
 
+    job_id = submit_ai_job(current_user.id, work, cache_key=ai_cache_key("image", prompt))
+    return {"job_id": job_id, "status": "pending"}
+
+@router.get("/ai-jobs/{job_id}")
+def get_ai_job_status(
+    job_id: str,
+    current_user: User = Depends(_get_user_from_token)
+):
+    """Poll a queued AI job; the result fields are merged in once it is done"""
+    job = get_ai_job(job_id, current_user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == "error":
+        raise HTTPException(status_code=500, detail=job["error"])
+    
+    response = {"job_id": job_id, "status": job["status"]}
+    if job["status"] == "done":
+        response.update(job["result"])
+    return response
+
+
+
+def _load_socket_access(event_id: int, user_id: int):
+    """User, event and membership for a chat socket handshake, read in one query"""
+    with Session(engine) as session:
+        row = session.exec(
+            _STMT_SOCKET_ACCESS, params={"eid": event_id, "uid": user_id}
+        ).first()
+    if row is None:
+        return None, None, False
+    evt, is_attendee = row[0], row[-1]
+    user = row if row.id is not None else None
+    return user, evt, evt.created_by == user_id or bool(is_attendee)
+
+
+def _fetch_message_rows(stmt, params: Dict) -> List:
+    with Session(engine) as session:
+        return session.exec(stmt, params=params).all()
+
+
+async def _load_initial_messages(synchronizer, event_id: int, user_id: int) -> List[Dict]:
+    """Latest chat messages for a joining socket; the queries run in worker threads off the event loop"""
+    rows = {}
+    if not synchronizer.is_initialized():
+        recent = await asyncio.to_thread(
+            _fetch_message_rows, _STMT_RECENT_MESSAGE_ROWS_FOR_USER, {"eid": event_id, "uid": user_id}
+        )
+        rows.update((row[0], row) for row in recent)
+        
+        
+        if not synchronizer.is_initialized():
+            for row in reversed(recent):
+                msg_id, content, is_deleted, created_at = row[:4]
+                if created_at.tzinfo is None:
+                    created_at = created_at.replace(tzinfo=timezone.utc)
+                synchronizer.initialize_message_version(
+                    message_id=msg_id,
+                    user_id=row[-1],
+                    content=content if not is_deleted else "",
+                    created_at=created_at
+                )
+            synchronizer.mark_initialized()
+    
+    
+    ordered_versions = synchronizer.get_ordered_messages(limit=50)
+    
+    
+    missing_ids = [v.message_id for v in ordered_versions if v.message_id not in rows]
+    if missing_ids:
+        rows.update(
+            (row[0], row)
+            for row in await asyncio.to_thread(
+                _fetch_message_rows, _STMT_MESSAGE_ROWS_FOR_USER, {"mids": missing_ids, "uid": user_id}
+            )
+        )
+    
+    messages_list = []
+    authors = {}
+    for msg_version in ordered_versions:
+        row = rows.get(msg_version.message_id)
+        if not row:
+            continue
+        msg_id, content, is_deleted, created_at, author_id, name, email, photo_url, is_verified, read_id, _ = row
+        
+        author = authors.get(author_id)
+        if author is None:
+            author = authors[author_id] = {
+                "id": author_id,
+                "name": name,
+                "email": email,
+                "photo_url": photo_url,
+                "is_verified": is_verified
+            } if author_id is not None else {
+                "id": author_id,
+                "name": "Unknown",
+                "email": "",
+                "photo_url": None,
+                "is_verified": False
+            }
+        
+        messages_list.append(_message_payload(
+            msg_id, content, is_deleted, created_at, author,
+            is_read_by_me=read_id is not None, msg_version=msg_version
+        ))
+    return messages_list
 
 
 @router.websocket("/{event_id}/ws")
 async def event_chat_websocket(websocket: WebSocket, event_id: int):
     """WebSocket endpoint for real-time event chat"""
     
-    global _main_event_loop
-    if _main_event_loop is None:
-        import asyncio
-        try:
-            _main_event_loop = asyncio.get_running_loop()
-        except RuntimeError:
-            _main_event_loop = asyncio.get_event_loop()
     await websocket.accept()
     
     
@@ -1477,6 +1836,7 @@ async def event_chat_websocket(websocket: WebSocket, event_id: int):
     user_name = None
     user_email = None
     user_photo_url = None
+    user_is_verified = False
     try:
         token = websocket.query_params.get("token")
         if token:
@@ -1485,28 +1845,12 @@ async def event_chat_websocket(websocket: WebSocket, event_id: int):
             user_id = int(payload.get("sub"))
             
             
-            session_gen = get_session()
-            try:
-                session = next(session_gen)
-                try:
-                    user = session.get(User, user_id)
-                    if user:
-                        user_name = user.name or user.email
-                        user_email = user.email
-                        user_photo_url = user.photo_url
-                finally:
-                    
-                    try:
-                        next(session_gen)
-                    except StopIteration:
-                        pass
-            except Exception:
-                
-                try:
-                    session_gen.close()
-                except:
-                    pass
-                raise
+            user, evt, is_member = await asyncio.to_thread(_load_socket_access, event_id, user_id)
+            if user:
+                user_name = user.name or user.email
+                user_email = user.email
+                user_photo_url = user.photo_url
+                user_is_verified = user.is_verified
     except Exception as e:
         await websocket.close(code=1008, reason="Invalid authentication")
         return
@@ -1515,113 +1859,44 @@ async def event_chat_websocket(websocket: WebSocket, event_id: int):
         await websocket.close(code=1008, reason="Authentication required")
         return
     
+    user_snippet = {
+        "id": user_id,
+        "name": user_name,
+        "email": user_email,
+        "photo_url": user_photo_url,
+        "is_verified": user_is_verified
+    }
+    typing_frame = _ws_dumps({"type": "typing", "user_id": user_id, "user_name": user_name})
+    
+    
+    if not evt:
+        await websocket.close(code=1008, reason="Event not found")
+        return
+    
+    if not is_member:
+        await websocket.close(code=1008, reason="Access denied")
+        return
+    
+    
+    room = rooms[event_id]
+    conn = RoomConnection(websocket, user_id)
+    room.conns[user_id] = conn
+    if room.ticker is None or room.ticker.done():
+        room.ticker = asyncio.create_task(presence_ticker(event_id, room))
+    
+    
+    touch_presence(user_id)
+    
+    
+    synchronizer = get_synchronizer(str(event_id), "event")
+    
     
-    session_gen = get_session()
     try:
-        session = next(session_gen)
-        evt = session.get(Event, event_id)
-        if not evt:
-            await websocket.close(code=1008, reason="Event not found")
-            return
-        
-        
-        is_attendee = session.exec(
-            select(EventAttendee).where(
-                EventAttendee.event_id == event_id,
-                EventAttendee.user_id == user_id
-            )
-        ).first()
-        is_owner = evt.created_by == user_id
-        
-        if not is_attendee and not is_owner:
-            await websocket.close(code=1008, reason="Access denied")
-            return
-        
-        
-        if event_id not in event_connections:
-            event_connections[event_id] = {}
-        
-        
-        event_connections[event_id][user_id] = websocket
-        
-        
-        user_presence[user_id] = datetime.now(timezone.utc)
-        
-        
-        synchronizer = get_synchronizer(str(event_id), "event")
-        
-        
-        messages = session.exec(
-            select(EventMessage).where(EventMessage.event_id == event_id)
-            .order_by(EventMessage.created_at.desc())
-            .limit(50)
-        ).all()
-        
-        
-        
-        sorted_messages = sorted(messages, key=lambda m: m.created_at)
-        for msg in sorted_messages:
-            created_at = msg.created_at
-            if created_at.tzinfo is None:
-                created_at = created_at.replace(tzinfo=timezone.utc)
-            
-            
-            synchronizer.initialize_message_version(
-                message_id=msg.id,
-                user_id=msg.user_id,
-                content=msg.content if not msg.is_deleted else "",
-                created_at=created_at
-            )
-        
-        
-        ordered_versions = synchronizer.get_ordered_messages(limit=50)
-        
-        
-        messages_list = []
-        for msg_version in ordered_versions:
-            msg = session.get(EventMessage, msg_version.message_id)
-            if not msg:
-                continue
-                
-            msg_user = session.get(User, msg.user_id)
-            created_at_str = msg.created_at.isoformat()
-            if msg.created_at.tzinfo is None:
-                created_at_str = msg.created_at.replace(tzinfo=timezone.utc).isoformat()
-            if not created_at_str.endswith('Z') and msg.created_at.tzinfo == timezone.utc:
-                created_at_str = created_at_str.replace('+00:00', 'Z')
-            
-            
-            is_read = False
-            if user_id:
-                read_record = session.exec(
-                    select(MessageRead).where(
-                        MessageRead.message_id == msg.id,
-                        MessageRead.user_id == user_id
-                    )
-                ).first()
-                is_read = read_record is not None
-            
-            messages_list.append({
-                "id": msg.id,
-                "content": msg.content if not msg.is_deleted else "",
-                "is_deleted": msg.is_deleted,
-                "created_at": created_at_str,
-                "vector_clock": msg_version.vector_clock,  
-                "version": msg_version.version,
-                "is_read_by_me": is_read,
-                "user": {
-                    "id": msg_user.id if msg_user else user_id,
-                    "name": msg_user.name if msg_user else "Unknown",
-                    "email": msg_user.email if msg_user else "",
-                    "photo_url": msg_user.photo_url if msg_user else None,
-                    "is_verified": msg_user.is_verified if msg_user else False
-                }
-            })
-        
-        await websocket.send_json({
+        messages_list = await _load_initial_messages(synchronizer, event_id, user_id)
+        _start_connection(conn, _ws_dumps({
             "type": "initial_messages",
             "messages": messages_list
-        })
+        }))
         
         
         await broadcast_to_event(event_id, user_id, {
@@ -1632,256 +1907,225 @@ async def event_chat_websocket(websocket: WebSocket, event_id: int):
         })
         
         
-        try:
-            while True:
+        while True:
+            
+            if websocket.client_state.name != "CONNECTED":
+                break
+            
+            try:
+                raw = await websocket.receive_text()
+                if len(raw) > MAX_WS_FRAME_CHARS:
+                    continue
+                data = orjson.loads(raw)
+                message_type = data.get("type")
                 
-                if websocket.client_state.name != "CONNECTED":
-                    break
                 
-                try:
-                    data = await websocket.receive_json()
-                    message_type = data.get("type")
+                if message_type == "sync_message":
+                    
+                    incoming_msg = data.get("message")
+                    if incoming_msg:
+                        if synchronizer.is_known_version(incoming_msg.get("id"), incoming_msg.get("vector_clock", {})):
+                            continue
+                        msg_version = MessageVersion(
+                            message_id=incoming_msg.get("id"),
+                            vector_clock=incoming_msg.get("vector_clock", {}),
+                            content=incoming_msg.get("content", ""),
+                            user_id=incoming_msg.get("user_id"),
+                            created_at=datetime.fromisoformat(incoming_msg.get("created_at", "").replace('Z', '+00:00'))
+                        )
+                        is_new, merged = synchronizer.merge_message(msg_version)
+                        if is_new:
+                            
+                            await broadcast_to_event(event_id, user_id, {
+                                "type": "new_message",
+                                "message": incoming_msg
+                            })
+                    continue
+                
+                if message_type == "message":
                     
+                    now = datetime.now(timezone.utc)
+                    starts_at = evt.starts_at.replace(tzinfo=timezone.utc) if evt.starts_at.tzinfo is None else evt.starts_at
+                    ends_at = evt.ends_at if evt.ends_at else (starts_at + timedelta(hours=evt.duration))
+                    if ends_at.tzinfo is None:
+                        ends_at = ends_at.replace(tzinfo=timezone.utc)
                     
-                    if message_type == "sync_message":
+                    is_past = now >= ends_at
+                    if is_past:
                         
-                        incoming_msg = data.get("message")
-                        if incoming_msg:
-                            synchronizer = get_synchronizer(str(event_id), "event")
-                            msg_version = MessageVersion(
-                                message_id=incoming_msg.get("id"),
-                                vector_clock=incoming_msg.get("vector_clock", {}),
-                                content=incoming_msg.get("content", ""),
-                                user_id=incoming_msg.get("user_id"),
-                                created_at=datetime.fromisoformat(incoming_msg.get("created_at", "").replace('Z', '+00:00'))
-                            )
-                            is_new, merged = synchronizer.merge_message(msg_version)
-                            if is_new:
-                                
-                                await broadcast_to_event(event_id, user_id, {
-                                    "type": "new_message",
-                                    "message": incoming_msg
-                                })
+                        _enqueue(conn, _ws_dumps({
+                            "type": "error",
+                            "message": "This event has ended. Chat is now read-only. You can still view message history."
+                        }))
                         continue
                     
-                    if message_type == "message":
-                        
-                        now = datetime.now(timezone.utc)
-                        starts_at = evt.starts_at.replace(tzinfo=timezone.utc) if evt.starts_at.tzinfo is None else evt.starts_at
-                        ends_at = evt.ends_at if evt.ends_at else (starts_at + timedelta(hours=evt.duration))
-                        if ends_at.tzinfo is None:
-                            ends_at = ends_at.replace(tzinfo=timezone.utc)
-                        
-                        is_past = now >= ends_at
-                        if is_past:
-                            
-                            await websocket.send_json({
-                                "type": "error",
-                                "message": "This event has ended. Chat is now read-only. You can still view message history."
-                            })
-                            continue
-                        
-                        
-                        content = data.get("content", "").strip()
-                        if not content or len(content) > 1000:
-                            continue
-                        
-                        
-                        synchronizer = get_synchronizer(str(event_id), "event")
-                        
-                        
-                        message = EventMessage(
-                            event_id=event_id,
-                            user_id=user_id,
-                            content=content
-                        )
-                        session.add(message)
-                        session.commit()
-                        session.refresh(message)
-                        
-                        
-                        created_at = message.created_at
-                        if created_at.tzinfo is None:
-                            created_at = created_at.replace(tzinfo=timezone.utc)
-                        
-                        msg_version = synchronizer.create_message_version(
-                            message_id=message.id,
-                            user_id=user_id,
-                            content=content,
-                            created_at=created_at
-                        )
-                        
-                        
-                        user_presence[user_id] = datetime.now(timezone.utc)
-                        
-                        
-                        created_at_str = message.created_at.isoformat()
-                        if message.created_at.tzinfo is None:
-                            created_at_str = message.created_at.replace(tzinfo=timezone.utc).isoformat()
-                        if not created_at_str.endswith('Z') and message.created_at.tzinfo == timezone.utc:
-                            created_at_str = created_at_str.replace('+00:00', 'Z')
-                        
-                        
-                        msg_user = session.get(User, user_id)
-                        
-                        
-                        await broadcast_to_event(event_id, None, {
-                            "type": "new_message",
-                            "message": {
-                                "id": message.id,
-                                "content": message.content,
-                                "is_deleted": False,
-                                "created_at": created_at_str,
-                                "vector_clock": msg_version.vector_clock,  
-                                "version": msg_version.version,
-                                "is_read_by_me": False,
-                                "user": {
-                                    "id": user_id,
-                                    "name": msg_user.name if msg_user else user_name,
-                                    "email": msg_user.email if msg_user else user_email,
-                                    "photo_url": msg_user.photo_url if msg_user else user_photo_url,
-                                    "is_verified": msg_user.is_verified if msg_user else False
-                                }
-                            }
-                        })
                     
-                    elif message_type == "typing":
-                        
-                        typing_status[event_id][user_id] = datetime.now(timezone.utc)
-                        user_presence[user_id] = datetime.now(timezone.utc)
-                        
-                        
-                        await broadcast_to_event(event_id, user_id, {
-                            "type": "typing",
-                            "user_id": user_id,
-                            "user_name": user_name
-                        })
+                    content = data.get("content", "").strip()
+                    if not content or len(content) > 1000:
+                        continue
                     
-                    elif message_type == "presence_ping":
-                        
-                        user_presence[user_id] = datetime.now(timezone.utc)
-                        
-                        
-                        now = datetime.now(timezone.utc)
-                        online_users = []
-                        if event_id in event_connections:
-                            for uid in event_connections[event_id].keys():
-                                if uid != user_id and uid in user_presence:
-                                    if (now - user_presence[uid]).total_seconds() < PRESENCE_TIMEOUT_SECONDS:
-                                        online_users.append(uid)
-                        
-                        await websocket.send_json({
-                            "type": "presence_update",
-                            "online_users": online_users
-                        })
+                    content_hash = hash(content)
+                    now_m = time.monotonic()
+                    last_hash, last_at = _last_message_hash.get(user_id, (None, 0.0))
+                    if last_hash == content_hash and now_m - last_at < DUPLICATE_MESSAGE_WINDOW_SECONDS:
+                        continue
+                    _last_message_hash[user_id] = (content_hash, now_m)
                     
-                    elif message_type == "mark_read":
-                        
-                        message_id = data.get("message_id")
-                        if message_id:
-                            try:
-                                
-                                existing_read = session.exec(
-                                    select(MessageRead).where(
-                                        MessageRead.message_id == message_id,
-                                        MessageRead.message_type == "event",
-                                        MessageRead.user_id == user_id
-                                    )
-                                ).first()
-                                
-                                if not existing_read:
-                                    read_record = MessageRead(
-                                        message_id=message_id,
-                                        message_type="event",  
-                                        user_id=user_id
-                                    )
-                                    session.add(read_record)
-                                    session.commit()
-                                    
-                                    
-                                    await broadcast_to_event(event_id, user_id, {
-                                        "type": "message_read",
-                                        "message_id": message_id,
-                                        "user_id": user_id
-                                    })
-                            except Exception as e:
-                                
-                                session.rollback()
-                                print(f"Error marking message as read: {e}")
-                                
-                except WebSocketDisconnect:
                     
-                    print("WebSocket disconnected normally")
-                    break
-                except RuntimeError as e:
+                    message_uuid = uuid4().hex
                     
-                    if "disconnect" in str(e).lower():
-                        print("WebSocket disconnected (RuntimeError)")
-                        break
                     
-                    raise
-                except Exception as e:
+                    touch_presence(user_id)
                     
-                    print(f"Error processing WebSocket message: {e}")
                     
-                    if websocket.client_state.name != "CONNECTED":
-                        break
-                    continue
+                    await broadcast_to_event(event_id, None, {
+                        "type": "new_message",
+                        "message": {
+                            "id": message_uuid,
+                            "client_msg_id": message_uuid,
+                            "pending": True,
+                            "content": content,
+                            "is_deleted": False,
+                            "created_at": datetime.now(timezone.utc),
+                            "vector_clock": {},
+                            "version": 0,
+                            "is_read_by_me": False,
+                            "user": user_snippet
+                        }
+                    })
+                    
+                    _ensure_db_writer()
+                    _write_queue.put_nowait((event_id, user_id, message_uuid, content, user_snippet))
                 
-        except WebSocketDisconnect:
-            print("WebSocket disconnected normally")
-            pass
-        except RuntimeError as e:
-            
-            if "disconnect" in str(e).lower():
-                print("WebSocket disconnected (RuntimeError in outer catch)")
-            else:
-                print(f"WebSocket RuntimeError: {e}")
-        except Exception as e:
-            
-            print(f"WebSocket error in main loop: {e}")
-            import traceback
-            traceback.print_exc()
-        finally:
-            
-            if event_id in event_connections and user_id in event_connections[event_id]:
-                del event_connections[event_id][user_id]
-            
+                elif message_type == "typing":
+                    
+                    set_typing(event_id, user_id)
+                    touch_presence(user_id)
+                    
+                    
+                    await broadcast_prepared(event_id, user_id, typing_frame)
+                
+                elif message_type == "presence_ping":
+                    
+                    touch_presence(user_id)
+                
+                elif message_type == "mark_read":
+                    
+                    message_id = data.get("message_id")
+                    if isinstance(message_id, int) and message_id > 0:
+                        _ensure_read_writer()
+                        _read_queue.put_nowait((event_id, message_id, user_id))
+                            
+            except WebSocketDisconnect:
+                
+                logger.debug("WebSocket disconnected normally")
+                break
+            except RuntimeError as e:
+                
+                if "disconnect" in str(e).lower():
+                    logger.debug("WebSocket disconnected (RuntimeError)")
+                    break
+                
+                raise
+            except Exception as e:
+                
+                logger.warning("Error processing WebSocket message: %s", e)
+                
+                if websocket.client_state.name != "CONNECTED":
+                    break
+                continue
             
-            await broadcast_to_event(event_id, user_id, {
-                "type": "user_left",
-                "user_id": user_id
-            })
+    except WebSocketDisconnect:
+        logger.debug("WebSocket disconnected normally")
+        pass
+    except RuntimeError as e:
+        
+        if "disconnect" in str(e).lower():
+            logger.debug("WebSocket disconnected (RuntimeError in outer catch)")
+        else:
+            logger.warning("WebSocket RuntimeError: %s", e)
+    except Exception as e:
+        
+        logger.exception("WebSocket error in main loop: %s", e)
     finally:
         
+        if room.conns.get(user_id) is conn:
+            del room.conns[user_id]
+        if conn.writer:
+            conn.writer.cancel()
+        clear_typing(event_id, user_id)
+        if not room.conns and rooms.get(event_id) is room:
+            del rooms[event_id]
+            if room.ticker:
+                room.ticker.cancel()
+        
+        
+        await broadcast_to_event(event_id, user_id, {
+            "type": "user_left",
+            "user_id": user_id
+        })
+
+def _start_connection(conn: RoomConnection, first_frame: str):
+    """Queue first_frame ahead of frames broadcast while the socket was loading, then start its writer"""
+    queued = []
+    while not conn.outbox.empty():
+        queued.append(conn.outbox.get_nowait())
+    conn.outbox.put_nowait(first_frame)
+    for payload in queued[:OUTBOUND_QUEUE_SIZE - 1]:
+        conn.outbox.put_nowait(payload)
+    conn.writer = asyncio.create_task(_connection_writer(conn))
+
+
+def _enqueue(conn: RoomConnection, payload: str) -> bool:
+    try:
+        conn.outbox.put_nowait(payload)
+        return True
+    except asyncio.QueueFull:
+        return False
+
+
+async def _connection_writer(conn: RoomConnection):
+    """Send queued frames in order; a failed or stalled send closes the socket"""
+    try:
+        while True:
+            payload = await conn.outbox.get()
+            await asyncio.wait_for(conn.ws.send_text(payload), BROADCAST_SEND_TIMEOUT_SECONDS)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
         try:
-            if 'session_gen' in locals():
-                try:
-                    next(session_gen)
-                except StopIteration:
-                    pass
-                except Exception:
-                    try:
-                        session_gen.close()
-                    except:
-                        pass
-        except:
+            await asyncio.wait_for(conn.ws.close(code=1013), BROADCAST_SEND_TIMEOUT_SECONDS)
+        except Exception:
             pass
 
+
 async def broadcast_to_event(event_id: int, exclude_user_id: Optional[int], message: Dict):
-    """Broadcast message to all connected users in an event"""
-    if event_id not in event_connections:
+    """Queue message for every connected user in an event; peers with a full outbox are dropped"""
+    room = rooms.get(event_id)
+    if room is None or len(room.conns) <= (exclude_user_id in room.conns):
+        return
+    await broadcast_prepared(event_id, exclude_user_id, _ws_dumps(message))
+
+
+async def broadcast_prepared(event_id: int, exclude_user_id: Optional[int], payload: str):
+    """Queue an already serialized frame for every connected user in an event"""
+    room = rooms.get(event_id)
+    if room is None:
         return
     
-    disconnected = []
-    for user_id, ws in event_connections[event_id].items():
-        if exclude_user_id is None or user_id != exclude_user_id:
-            try:
-                await ws.send_json(message)
-            except:
-                disconnected.append(user_id)
-    
-    
-    for user_id in disconnected:
-        if event_id in event_connections and user_id in event_connections[event_id]:
-            del event_connections[event_id][user_id]
\ No newline at end of file
+    skip = room.conns.get(exclude_user_id)
+    full = [conn for conn in room.conns.values() if conn is not skip and not _enqueue(conn, payload)]
+    
+    dropped = []
+    for conn in full:
+        if room.conns.get(conn.user_id) is conn:
+            del room.conns[conn.user_id]
+        if conn.writer:
+            conn.writer.cancel()
+        dropped.append(conn.ws)
+    
+    if dropped:
+        await asyncio.gather(
+            *(asyncio.wait_for(ws.close(code=1013), BROADCAST_SEND_TIMEOUT_SECONDS) for ws in dropped),
+            return_exceptions=True
+        )
@@ -1,6 +1,11 @@
 from sqlmodel import SQLModel, create_engine, Session
 from app.core.config import settings
 
+POOL_SIZE = 20
+POOL_MAX_OVERFLOW = 40
+
+SYNC_HANDLER_THREADS = POOL_SIZE + POOL_MAX_OVERFLOW
+
 connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
 if settings.DATABASE_URL.startswith("sqlite"):
     from sqlalchemy.pool import NullPool
@@ -15,8 +20,8 @@ else:
         settings.DATABASE_URL, 
         connect_args=connect_args, 
         pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
         pool_recycle=3600
     )
 
@@ -27,7 +32,16 @@ def init_db() -> None:
     SQLModel.metadata.create_all(engine)
 
 
+def insert_ignore(model):
+    """INSERT ... ON CONFLICT DO NOTHING builder for the configured dialect."""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
 def get_session():
-    with Session(engine) as session:
+    with Session(engine, expire_on_commit=False) as session:
         yield session
 
@@ -1,9 +1,12 @@
+import asyncio
+import anyio.to_thread
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from app.core.config import settings
-from app.core.db import init_db, engine
+from app.core.db import init_db, engine, SYNC_HANDLER_THREADS
 from app.seed import seed_db
 from sqlmodel import Session
 from app.api.version_one import health as health_router
@@ -11,11 +14,10 @@ from app.api.version_one import auth as auth_router
 from app.api.version_one import badges as badges_router
 from app.api.version_one import events as events_router
 from app.api.version_one import event_attendees as event_attendees_router
-from app.api.version_one import event_messages as event_messages_router
-from app.api.version_one import event_ws as event_ws_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    anyio.to_thread.current_default_thread_limiter().total_tokens = SYNC_HANDLER_THREADS
     init_db()
     try:
         with Session(engine) as session:
@@ -23,9 +25,11 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Seed warning: {e}")
     
+    sweeper = asyncio.create_task(events_router.state_sweeper())
     yield
+    sweeper.cancel()
 
-app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,6 +37,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.add_middleware(GZipMiddleware, minimum_size=2000)
@@ -42,6 +47,4 @@ app.include_router(auth_router.router, prefix=settings.API_PREFIX)
 app.include_router(badges_router.router, prefix=settings.API_PREFIX)
 app.include_router(events_router.router, prefix=settings.API_PREFIX)
 app.include_router(event_attendees_router.router, prefix=settings.API_PREFIX)
-app.include_router(event_messages_router.router, prefix=settings.API_PREFIX)
-app.include_router(event_ws_router.router, prefix=settings.API_PREFIX)
 
@@ -2,7 +2,7 @@ from sqlmodel import SQLModel, create_engine, text
 from app.core.config import settings
 
 def add_performance_indexes():
-    """Add indexes for frequently queried fields – events only."""
+    """Add indexes for frequently queried fields on events and chat tables."""
     connect_args = (
         {"check_same_thread": False}
         if settings.DATABASE_URL.startswith("sqlite")
@@ -15,9 +15,38 @@ def add_performance_indexes():
         "CREATE INDEX IF NOT EXISTS idx_event_created_at ON event(created_at DESC)",
         "CREATE INDEX IF NOT EXISTS idx_event_starts_at ON event(starts_at ASC)",
         "CREATE INDEX IF NOT EXISTS idx_event_created_by ON event(created_by)",
-        "CREATE INDEX IF NOT EXISTS idx_eventattendee_user_event ON eventattendee(user_id, event_id)"
+        "CREATE INDEX IF NOT EXISTS idx_eventattendee_user_event ON eventattendee(user_id, event_id)",
+        "DELETE FROM messageread WHERE id NOT IN (SELECT MIN(id) FROM messageread GROUP BY message_id, message_type, user_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_messageread_message_type_user ON messageread(message_id, message_type, user_id)",
+        "UPDATE eventattendee SET xp_awarded = TRUE WHERE id IN (SELECT MIN(id) FROM eventattendee GROUP BY event_id, user_id HAVING COUNT(*) > 1 AND MAX(CASE WHEN xp_awarded THEN 1 ELSE 0 END) = 1)",
+        "DELETE FROM eventattendee WHERE id NOT IN (SELECT MIN(id) FROM eventattendee GROUP BY event_id, user_id)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_event_attendee_event_user ON eventattendee(event_id, user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_event_attendee_event_joined ON eventattendee(event_id, joined_at)",
+        "CREATE INDEX IF NOT EXISTS ix_event_message_event_created_desc ON eventmessage(event_id, created_at DESC)",
+        "DROP INDEX IF EXISTS ix_eventattendee_event_id",
+        "DROP INDEX IF EXISTS ix_eventattendee_user_id",
+        "DROP INDEX IF EXISTS ix_messageread_message_id",
+        "DROP INDEX IF EXISTS ix_eventmessage_event_id"
     ]
 
+    if not settings.DATABASE_URL.startswith("sqlite"):
+        
+        indexes = [
+            sql.replace("CREATE INDEX IF NOT EXISTS", "CREATE INDEX CONCURRENTLY IF NOT EXISTS")
+               .replace("CREATE UNIQUE INDEX IF NOT EXISTS", "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS")
+               .replace("DROP INDEX IF EXISTS", "DROP INDEX CONCURRENTLY IF EXISTS")
+            for sql in indexes
+        ]
+
+        indexes += [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_event_title_trgm ON event USING gin (title gin_trgm_ops)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_event_description_trgm ON event USING gin (description gin_trgm_ops)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_event_location_trgm ON event USING gin (location gin_trgm_ops)",
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_event_exam_trgm ON event USING gin (exam gin_trgm_ops)",
+        ]
+        engine = engine.execution_options(isolation_level="AUTOCOMMIT")
+
     with engine.connect() as conn:
         for index_sql in indexes:
             try:
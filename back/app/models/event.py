@@ -1,5 +1,6 @@
 from typing import Optional
 from datetime import datetime, timedelta
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field
 from pydantic import field_validator
 
@@ -25,6 +26,11 @@ class EventBase(SQLModel):
 
 
 class Event(EventBase, table=True):
+    __table_args__ = (
+        Index("idx_event_starts_at", "starts_at"),
+        Index("idx_event_created_at", text("created_at DESC")),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True, index=True)
     created_by: int = Field(index=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -1,11 +1,18 @@
 from typing import Optional
 from datetime import datetime
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 
 class EventAttendee(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_event_attendee_event_user", "event_id", "user_id", unique=True),
+        Index("idx_eventattendee_user_event", "user_id", "event_id"),
+        Index("ix_event_attendee_event_joined", "event_id", "joined_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    event_id: int = Field(index=True, foreign_key="event.id")
-    user_id: int = Field(index=True, foreign_key="user.id")
+    event_id: int = Field(foreign_key="event.id")
+    user_id: int = Field(foreign_key="user.id")
     joined_at: datetime = Field(default_factory=datetime.utcnow)
     xp_awarded: bool = Field(default=False, index=True)  # Track if XP has been awarded for this event
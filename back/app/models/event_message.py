@@ -1,11 +1,16 @@
 from typing import Optional
 from datetime import datetime, timezone
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field
 
 
 class EventMessage(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_event_message_event_created_desc", "event_id", text("created_at DESC")),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    event_id: int = Field(index=True, foreign_key="event.id")
+    event_id: int = Field(foreign_key="event.id")
     user_id: int = Field(index=True, foreign_key="user.id")
     content: str
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
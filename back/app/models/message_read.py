@@ -1,11 +1,16 @@
 from typing import Optional
 from datetime import datetime, timezone
+from sqlalchemy import UniqueConstraint
 from sqlmodel import SQLModel, Field
 
 
 class MessageRead(SQLModel, table=True):
+    __table_args__ = (
+        UniqueConstraint("message_id", "message_type", "user_id", name="uq_messageread_message_type_user"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    message_id: int = Field(index=True)
+    message_id: int
     message_type: str = Field(default="event")
     user_id: int = Field(index=True, foreign_key="user.id")
     read_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
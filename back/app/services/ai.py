@@ -1,24 +1,27 @@
 """AI service for OpenAI integration"""
-from openai import OpenAI
+import logging
+from openai import AsyncOpenAI
 from app.core.config import settings
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
 _client = None
 
-def get_openai_client() -> OpenAI:
+def get_openai_client() -> AsyncOpenAI:
     """Get or create OpenAI client instance"""
     global _client
     if _client is None:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is not set in environment variables")
-        _client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        _client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
     return _client
 
 async def test_connection() -> bool:
     """Test OpenAI API connection"""
     try:
         client = get_openai_client()
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-3.5-turbo",
             messages=[
                 {"role": "user", "content": "Say 'Hello' if you can read this."}
@@ -27,7 +30,7 @@ async def test_connection() -> bool:
         )
         return response.choices[0].message.content is not None
     except Exception as e:
-        print(f"OpenAI connection test failed: {e}")
+        logger.warning("OpenAI connection test failed: %s", e)
         return False
 
 async def refine_text(
@@ -132,7 +135,7 @@ Your task:
 Think like a creative copywriter. Return ONLY the refined text. No quotes, no explanations."""
 
     try:
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {
@@ -155,7 +158,7 @@ Think like a creative copywriter. Return ONLY the refined text. No quotes, no ex
         return refined_text
         
     except Exception as e:
-        print(f"OpenAI API error during text refinement: {e}")
+        logger.error("OpenAI API error during text refinement: %s", e)
         raise Exception(f"Failed to refine text: {str(e)}")
 
 async def generate_image(prompt: str) -> str:
@@ -175,7 +178,7 @@ The image should be: modern, clean, visually appealing, suitable for a study pla
 Style: professional, educational, inspiring, with good composition and colors that work well as a cover image."""
     
     try:
-        response = client.images.generate(
+        response = await client.images.generate(
             model="dall-e-3",
             prompt=enhanced_prompt,
             size="1024x1024",
@@ -189,6 +192,6 @@ Style: professional, educational, inspiring, with good composition and colors th
         return f"data:image/png;base64,{image_b64}"
         
     except Exception as e:
-        print(f"OpenAI DALL-E API error: {e}")
+        logger.error("OpenAI DALL-E API error: %s", e)
         raise Exception(f"Failed to generate image: {str(e)}")
 
@@ -0,0 +1,90 @@
+"""Background AI jobs: bounded concurrency, results kept in memory for polling"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+MAX_PARALLEL_AI_CALLS = 4
+AI_JOB_TTL_SECONDS = 600
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_job_by_key: Dict[Tuple[int, str], str] = {}
+_running: Set[asyncio.Task] = set()
+_semaphore = asyncio.Semaphore(MAX_PARALLEL_AI_CALLS)
+
+
+def _prune_finished_jobs():
+    cutoff = time.monotonic() - AI_JOB_TTL_SECONDS
+    expired = [
+        job_id for job_id, job in _jobs.items()
+        if job["finished_at"] is not None and job["finished_at"] < cutoff
+    ]
+    for job_id in expired:
+        job = _jobs.pop(job_id, None)
+        if job and job["cache_key"] is not None:
+            _job_by_key.pop((job["user_id"], job["cache_key"]), None)
+
+
+def ai_cache_key(*parts: str) -> str:
+    """Stable digest of the inputs that fully determine an AI job's result"""
+    return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).hexdigest()
+
+
+async def _run_job(job_id: str, work: Callable[[], Awaitable[Dict[str, Any]]]):
+    job = _jobs[job_id]
+    async with _semaphore:
+        job["status"] = "running"
+        try:
+            job["result"] = await work()
+            job["status"] = "done"
+        except Exception as e:
+            logger.warning("AI job %s failed: %s", job_id, e)
+            job["error"] = str(e)
+            job["status"] = "error"
+    job["finished_at"] = time.monotonic()
+
+
+def submit_ai_job(
+    user_id: int,
+    work: Callable[[], Awaitable[Dict[str, Any]]],
+    cache_key: Optional[str] = None,
+) -> str:
+    """Schedule work on the running loop and return the job id to poll.
+
+    With a cache_key, a live or finished (non-failed) job of the same user and key is reused
+    instead of calling the model again.
+    """
+    _prune_finished_jobs()
+    if cache_key is not None:
+        job_id = _job_by_key.get((user_id, cache_key))
+        job = _jobs.get(job_id) if job_id else None
+        if job is not None and job["status"] != "error":
+            return job_id
+
+    job_id = uuid4().hex
+    _jobs[job_id] = {
+        "user_id": user_id,
+        "status": "pending",
+        "result": None,
+        "error": None,
+        "finished_at": None,
+        "cache_key": cache_key,
+    }
+    if cache_key is not None:
+        _job_by_key[(user_id, cache_key)] = job_id
+    task = asyncio.get_running_loop().create_task(_run_job(job_id, work))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+    return job_id
+
+
+def get_ai_job(job_id: str, user_id: int) -> Optional[Dict[str, Any]]:
+    """Return the job if it exists and belongs to user_id"""
+    job = _jobs.get(job_id)
+    if job is None or job["user_id"] != user_id:
+        return None
+    return job
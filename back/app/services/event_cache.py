@@ -0,0 +1,47 @@
+"""Short-lived cache for event listing responses, invalidated by bumping a version on every event write"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+LIST_EVENTS_TTL_SECONDS = 30
+AUTOCOMPLETE_TTL_SECONDS = 10
+ATTENDEES_TTL_SECONDS = 30
+MAX_CACHED_RESPONSES = 512
+
+_lock = threading.Lock()
+_version = 0
+_entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+
+def _cache_key(namespace: str, params: Dict[str, Any]) -> str:
+    digest = hashlib.blake2b(repr(sorted(params.items())).encode(), digest_size=16).hexdigest()
+    return f"events:v{_version}:{namespace}:{digest}"
+
+
+def cached_response(namespace: str, params: Dict[str, Any], ttl: float, compute: Callable[[], Any]) -> Any:
+    """Return the cached value for (namespace, params) or compute and store it for ttl seconds"""
+    key = _cache_key(namespace, params)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            _entries.move_to_end(key)
+            return entry[1]
+
+    value = compute()
+
+    with _lock:
+        _entries[key] = (time.monotonic() + ttl, value)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_CACHED_RESPONSES:
+            _entries.popitem(last=False)
+    return value
+
+
+def invalidate_event_listings():
+    """Drop every cached listing; in-flight computations land under the old version and are never read"""
+    global _version
+    with _lock:
+        _version += 1
+        _entries.clear()
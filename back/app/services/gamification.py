@@ -10,7 +10,9 @@ EVENT-ONLY GAMIFICATION ENGINE
 from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict
-from sqlmodel import Session, select, func
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, func, or_
 
 from app.models import User, Event, EventAttendee
 from app.core.config import settings
@@ -20,6 +22,22 @@ def _to_utc(dt: datetime) -> datetime:
         return dt.replace(tzinfo=timezone.utc)
     return dt.astimezone(timezone.utc)
 
+def count_past_events(user_id: int, session: Session) -> int:
+    """Number of ended events the user attended or created, in one query."""
+    now = datetime.now(timezone.utc)
+    attended_ids = select(EventAttendee.event_id).where(EventAttendee.user_id == user_id)
+
+    rows = session.exec(
+        select(Event.starts_at, Event.duration).where(
+            or_(Event.created_by == user_id, Event.id.in_(attended_ids))
+        )
+    ).all()
+
+    return sum(
+        1 for starts_at, duration in rows
+        if _to_utc(starts_at) + timedelta(hours=duration) <= now
+    )
+
 def calculate_weekly_streak(user_id: int, session: Session, max_weeks_back: int = 52) -> int:
     """How many consecutive ISO weeks (backwards) contain ≥1 attended event."""
     now = datetime.now(timezone.utc)
@@ -69,7 +87,7 @@ class EngagementPredictor:
     """
 
     @staticmethod
-    def calculate_engagement_score(user_id: int, session: Session) -> float:
+    def calculate_engagement_score(user_id: int, session: Session, weekly_streak: Optional[int] = None) -> float:
         now = datetime.now(timezone.utc)
 
         
@@ -109,7 +127,7 @@ class EngagementPredictor:
             frequency_score = 0.0
 
         
-        streak = calculate_weekly_streak(user_id, session)
+        streak = calculate_weekly_streak(user_id, session) if weekly_streak is None else weekly_streak
         consistency_score = min(1.0, streak / 8.0)
 
         engagement = 0.4 * recency_score + 0.3 * frequency_score + 0.3 * consistency_score
@@ -126,8 +144,8 @@ class XPCalculator:
     @staticmethod
     def event_xp(user_id: int, event_id: int, session: Session) -> int:
         base = XPCalculator.BASE_EVENT_XP
-        engagement = EngagementPredictor.calculate_engagement_score(user_id, session)
         streak = calculate_weekly_streak(user_id, session)
+        engagement = EngagementPredictor.calculate_engagement_score(user_id, session, streak)
 
         xp = int(
             base
@@ -160,7 +178,7 @@ def award_event_xp(user_id: int, event_id: int, session: Session) -> int:
 
     
     is_attendee = session.exec(
-        select(EventAttendee).where(
+        select(EventAttendee.id, EventAttendee.xp_awarded).where(
             EventAttendee.event_id == event_id,
             EventAttendee.user_id == user_id
         )
@@ -186,27 +204,38 @@ def award_event_xp(user_id: int, event_id: int, session: Session) -> int:
     
     xp = XPCalculator.event_xp(user_id, event_id, session)
 
-    user = session.get(User, user_id)
-    if not user:
-        return 0
-
-    user.xp = (user.xp or 0) + xp
-    session.add(user)
     
-    
-    if is_attendee:
-        is_attendee.xp_awarded = True
-        session.add(is_attendee)
-    else:
-        
-        attendee = EventAttendee(
-            event_id=event_id,
-            user_id=user_id,
-            xp_awarded=True
-        )
-        session.add(attendee)
-    
-    session.commit()
+    try:
+        if is_attendee:
+            claimed = session.exec(
+                update(EventAttendee)
+                .where(EventAttendee.id == is_attendee.id, EventAttendee.xp_awarded == False)
+                .values(xp_awarded=True)
+            ).rowcount
+            if not claimed:
+                session.rollback()
+                return 0
+        else:
+            
+            session.add(EventAttendee(
+                event_id=event_id,
+                user_id=user_id,
+                xp_awarded=True
+            ))
+
+        credited = session.exec(
+            update(User)
+            .where(User.id == user_id)
+            .values(xp=func.coalesce(User.xp, 0) + xp)
+        ).rowcount
+        if not credited:
+            session.rollback()
+            return 0
+
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        return 0
 
     return xp
 
@@ -221,7 +250,7 @@ def award_xp_for_all_past_events(user_id: int, session: Session) -> Dict[str, in
     
     
     attendee_events = session.exec(
-        select(Event, EventAttendee)
+        select(Event.id, Event.starts_at, Event.duration)
         .join(EventAttendee, Event.id == EventAttendee.event_id)
         .where(
             EventAttendee.user_id == user_id,
@@ -231,17 +260,15 @@ def award_xp_for_all_past_events(user_id: int, session: Session) -> Dict[str, in
     ).all()
     
     
-    past_attendee_events = []
-    for event, attendee in attendee_events:
-        starts_at = _to_utc(event.starts_at)
-        ends_at = starts_at + timedelta(hours=event.duration)
-        if ends_at <= now:
-            past_attendee_events.append((event, attendee))
+    past_attendee_event_ids = [
+        event_id for event_id, starts_at, duration in attendee_events
+        if _to_utc(starts_at) + timedelta(hours=duration) <= now
+    ]
     
     
     
     creator_events = session.exec(
-        select(Event)
+        select(Event.id, Event.starts_at, Event.duration)
         .where(
             Event.created_by == user_id,
             Event.starts_at <= now  
@@ -249,31 +276,18 @@ def award_xp_for_all_past_events(user_id: int, session: Session) -> Dict[str, in
     ).all()
     
     
-    past_creator_events = []
-    for event in creator_events:
-        starts_at = _to_utc(event.starts_at)
-        ends_at = starts_at + timedelta(hours=event.duration)
-        if ends_at <= now:
-            past_creator_events.append(event)
-    
-    
-    creator_event_ids = {e.id for e in past_creator_events}
-    attendee_event_ids = {e.id for e, _ in past_attendee_events}
-    creator_only_events = [e for e in past_creator_events if e.id not in attendee_event_ids]
+    attendee_event_ids = set(past_attendee_event_ids)
+    creator_only_event_ids = [
+        event_id for event_id, starts_at, duration in creator_events
+        if _to_utc(starts_at) + timedelta(hours=duration) <= now and event_id not in attendee_event_ids
+    ]
     
     total_xp_awarded = 0
     events_processed = 0
     
     
-    for event, attendee in past_attendee_events:
-        xp = award_event_xp(user_id, event.id, session)
-        if xp > 0:
-            total_xp_awarded += xp
-            events_processed += 1
-    
-    
-    for event in creator_only_events:
-        xp = award_event_xp(user_id, event.id, session)
+    for event_id in past_attendee_event_ids + creator_only_event_ids:
+        xp = award_event_xp(user_id, event_id, session)
         if xp > 0:
             total_xp_awarded += xp
             events_processed += 1
@@ -347,46 +361,10 @@ class BadgeSystem:
 
     @staticmethod
     def _stats(user_id: int, session: Session) -> Dict:
-        now = datetime.now(timezone.utc)
-
-        
-        
-        
-        
-        
-        attendee_events = session.exec(
-            select(Event)
-            .join(EventAttendee, Event.id == EventAttendee.event_id)
-            .where(EventAttendee.user_id == user_id)
-        ).all()
-        
-        
-        created_events = session.exec(
-            select(Event)
-            .where(Event.created_by == user_id)
-        ).all()
-        
-        
-        all_event_ids = set()
-        for event in attendee_events:
-            all_event_ids.add(event.id)
-        for event in created_events:
-            all_event_ids.add(event.id)
-        
-        
-        past_events_count = 0
-        for event_id in all_event_ids:
-            event = session.get(Event, event_id)
-            if event:
-                starts_at = _to_utc(event.starts_at)
-                ends_at = starts_at + timedelta(hours=event.duration)
-                if ends_at <= now:
-                    past_events_count += 1
-        
-        events_attended = past_events_count
+        events_attended = count_past_events(user_id, session)
 
         weekly_streak = calculate_weekly_streak(user_id, session)
-        engagement = EngagementPredictor.calculate_engagement_score(user_id, session)
+        engagement = EngagementPredictor.calculate_engagement_score(user_id, session, weekly_streak)
 
         return {
             "events_attended": events_attended,
@@ -395,7 +373,7 @@ class BadgeSystem:
         }
 
     @staticmethod
-    def get_user_badge(user_id: int, session: Session) -> Dict:
+    def get_user_badge(user_id: int, session: Session, stats: Optional[Dict] = None) -> Dict:
         user = session.get(User, user_id)
         if not user:
             return BadgeSystem.BADGES[0]
@@ -404,7 +382,8 @@ class BadgeSystem:
         if user.email == settings.ADMIN_EMAIL:
             return BadgeSystem.BADGES[-1]
 
-        stats = BadgeSystem._stats(user_id, session)
+        if stats is None:
+            stats = BadgeSystem._stats(user_id, session)
         total_xp = user.xp or 0
 
         
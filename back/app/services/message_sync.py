@@ -3,10 +3,13 @@ Advanced Message Synchronization System with Vector Clocks and Conflict Resoluti
 Used only for EVENT chats (groups removed).
 """
 
+import logging
 from typing import Dict, List, Tuple, Optional
 from datetime import datetime, timezone
 from collections import defaultdict
 
+logger = logging.getLogger(__name__)
+
 
 class VectorClock:
     """Vector clock for causal ordering of messages"""
@@ -27,10 +30,12 @@ class VectorClock:
 
     def happens_before(self, other: Dict[int, int]) -> bool:
         at_least_one_less = False
-        for node_id in set(list(self.clock.keys()) + list(other.keys())):
-            if self.clock[node_id] > other.get(node_id, 0):
+        clock_get, other_get = self.clock.get, other.get
+        for node_id in self.clock.keys() | other.keys():
+            mine, theirs = clock_get(node_id, 0), other_get(node_id, 0)
+            if mine > theirs:
                 return False
-            if self.clock[node_id] < other.get(node_id, 0):
+            if mine < theirs:
                 at_least_one_less = True
         return at_least_one_less
 
@@ -70,6 +75,16 @@ class MessageSynchronizer:
         self.context_id = context_id
         self.vector_clocks: Dict[int, VectorClock] = {}
         self.message_versions: Dict[int, MessageVersion] = {}
+        self._initialized = False
+
+    def is_initialized(self) -> bool:
+        return self._initialized
+
+    def mark_initialized(self):
+        self._initialized = True
+
+    def invalidate(self):
+        self._initialized = False
 
     def get_or_create_clock(self, user_id: int) -> VectorClock:
         if user_id not in self.vector_clocks:
@@ -115,6 +130,14 @@ class MessageSynchronizer:
         self.message_versions[message_id] = version
         return version
 
+    def is_known_version(self, message_id, vector_clock: Dict[int, int]) -> bool:
+        """True when merge_message would keep the existing copy, checked before building a MessageVersion"""
+        existing = self.message_versions.get(message_id)
+        if existing is None:
+            return False
+        version = max(vector_clock.values()) if vector_clock else 0
+        return version < existing.version or (version == existing.version and vector_clock == existing.vector_clock)
+
     def merge_message(self, message_version: MessageVersion) -> Tuple[bool, Optional[MessageVersion]]:
         if message_version.message_id in self.message_versions:
             existing = self.message_versions[message_version.message_id]
@@ -162,6 +185,11 @@ class MessageSynchronizer:
 
         for remote_msg in remote_messages:
             try:
+                if self.is_known_version(
+                    remote_msg.get("message_id") or remote_msg.get("id"), remote_msg.get("vector_clock", {})
+                ):
+                    continue
+
                 created_at_str = remote_msg.get("created_at", "")
                 if isinstance(created_at_str, str):
                     if created_at_str.endswith('Z'):
@@ -182,7 +210,7 @@ class MessageSynchronizer:
                 if is_new and merged:
                     updated.append(merged)
             except Exception as e:
-                print(f"Error syncing message: {e}")
+                logger.warning("Error syncing message: %s", e)
 
         return updated
 
@@ -0,0 +1,98 @@
+"""Typing and presence state with per-entry expiry, so idle users and rooms are evicted instead of piling up"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List
+
+TYPING_TTL_SECONDS = 3
+PRESENCE_TTL_SECONDS = 300
+PRESENCE_WRITE_INTERVAL_SECONDS = 1.0
+PRESENCE_TTL_NS = PRESENCE_TTL_SECONDS * 1_000_000_000
+PRESENCE_WRITE_INTERVAL_NS = int(PRESENCE_WRITE_INTERVAL_SECONDS * 1_000_000_000)
+
+_lock = threading.Lock()
+_typing: Dict[int, Dict[int, float]] = {}
+_presence: "OrderedDict[int, int]" = OrderedDict()
+
+
+def _expire_presence(now_ns: int):
+    cutoff = now_ns - PRESENCE_TTL_NS
+    while _presence:
+        uid, seen = next(iter(_presence.items()))
+        if seen >= cutoff:
+            break
+        _presence.popitem(last=False)
+
+
+def touch_presence(user_id: int):
+    """Mark user_id as online, coalescing writes to at most one per PRESENCE_WRITE_INTERVAL_SECONDS"""
+    now_ns = time.monotonic_ns()
+    with _lock:
+        seen = _presence.get(user_id)
+        if seen is not None and now_ns - seen <= PRESENCE_WRITE_INTERVAL_NS:
+            return
+        _presence[user_id] = now_ns
+        _presence.move_to_end(user_id)
+        _expire_presence(now_ns)
+
+
+def last_seen(user_ids: Iterable[int]) -> Dict[int, datetime]:
+    """Last activity for each of user_ids that is still online"""
+    now_ns = time.monotonic_ns()
+    with _lock:
+        _expire_presence(now_ns)
+        scores = {uid: _presence[uid] for uid in user_ids if uid in _presence}
+    wall_now = time.time()
+    return {
+        uid: datetime.fromtimestamp(wall_now - (now_ns - ts) / 1e9, timezone.utc)
+        for uid, ts in scores.items()
+    }
+
+
+def online_user_ids(user_ids: Iterable[int]) -> List[int]:
+    with _lock:
+        _expire_presence(time.monotonic_ns())
+        return [uid for uid in user_ids if uid in _presence]
+
+
+def set_typing(event_id: int, user_id: int):
+    with _lock:
+        _typing.setdefault(event_id, {})[user_id] = time.monotonic()
+
+
+def typing_user_ids(event_id: int) -> List[int]:
+    """Users still typing in event_id; expired entries and empty events are dropped"""
+    cutoff = time.monotonic() - TYPING_TTL_SECONDS
+    with _lock:
+        typing = _typing.get(event_id)
+        if not typing:
+            return []
+        for uid in [uid for uid, ts in typing.items() if ts < cutoff]:
+            del typing[uid]
+        if not typing:
+            del _typing[event_id]
+            return []
+        return list(typing)
+
+
+def clear_typing(event_id: int, user_id: int):
+    with _lock:
+        typing = _typing.get(event_id)
+        if typing is not None:
+            typing.pop(user_id, None)
+            if not typing:
+                del _typing[event_id]
+
+
+def sweep_presence():
+    """Drop expired presence and typing entries, including events nobody has polled since"""
+    cutoff = time.monotonic() - TYPING_TTL_SECONDS
+    with _lock:
+        _expire_presence(time.monotonic_ns())
+        for event_id in list(_typing):
+            typing = _typing[event_id]
+            for uid in [uid for uid, ts in typing.items() if ts < cutoff]:
+                del typing[uid]
+            if not typing:
+                del _typing[event_id]
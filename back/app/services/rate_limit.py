@@ -0,0 +1,26 @@
+"""In-process token buckets keyed by (route, user) so chatty clients are throttled before they reach the DB"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+MAX_TRACKED_BUCKETS = 10000
+
+_lock = threading.Lock()
+_buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+
+def take_token(key: str, rate: float, per: float) -> bool:
+    """Spend one token from key's bucket of `rate` tokens refilled every `per` seconds; False when empty"""
+    now = time.monotonic()
+    with _lock:
+        tokens, updated = _buckets.get(key, (rate, now))
+        tokens = min(rate, tokens + (now - updated) * rate / per)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        _buckets[key] = (tokens, now)
+        _buckets.move_to_end(key)
+        while len(_buckets) > MAX_TRACKED_BUCKETS:
+            _buckets.popitem(last=False)
+    return allowed
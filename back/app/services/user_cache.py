@@ -0,0 +1,58 @@
+"""Small short-lived LRU of user display fields (name, photo) for endpoints polled every second"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import bindparam, lambda_stmt
+from sqlmodel import Session, select
+
+from app.models import User
+
+USER_TTL_SECONDS = 30
+MAX_CACHED_USERS = 4096
+
+_STMT_USER_LIGHT = lambda_stmt(
+    lambda: select(User.id, User.name, User.email, User.photo_url)
+    .where(User.id.in_(bindparam("uids", expanding=True)))
+)
+
+_lock = threading.Lock()
+_users: "OrderedDict[int, Tuple[float, Tuple[str, Optional[str]]]]" = OrderedDict()
+
+
+def user_light(session: Session, user_ids: Iterable[int]) -> Dict[int, Tuple[str, Optional[str]]]:
+    """(display name, photo_url) for each existing user in user_ids; only cache misses hit the DB"""
+    user_ids = list(user_ids)
+    found = {}
+    now = time.monotonic()
+    with _lock:
+        for uid in user_ids:
+            entry = _users.get(uid)
+            if entry is None:
+                continue
+            if entry[0] < now:
+                del _users[uid]
+                continue
+            _users.move_to_end(uid)
+            found[uid] = entry[1]
+    missing = [uid for uid in user_ids if uid not in found]
+    if not missing:
+        return found
+
+    rows = session.exec(_STMT_USER_LIGHT, params={"uids": missing}).all()
+    expires = time.monotonic() + USER_TTL_SECONDS
+    with _lock:
+        for uid, name, email, photo_url in rows:
+            found[uid] = (name or email, photo_url)
+            _users[uid] = (expires, found[uid])
+            _users.move_to_end(uid)
+        while len(_users) > MAX_CACHED_USERS:
+            _users.popitem(last=False)
+    return found
+
+
+def forget_user(user_id: int):
+    """Drop user_id after a profile change so the next lookup reloads it"""
+    with _lock:
+        _users.pop(user_id, None)
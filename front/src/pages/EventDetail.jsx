@@ -7,7 +7,7 @@ import {
   faUserPlus, faUserMinus, faFile, faDownload, faCheckCircle,
   faFire, faStar, faTrophy, faInfoCircle, faComments, faPaperPlane, faTrash, faExclamationTriangle, faGraduationCap
 } from "@fortawesome/free-solid-svg-icons"
-import { setEventTypingStatus, markEventMessageRead, getUserProfile } from "../utils/api"
+import { setEventTypingStatus, markEventMessagesRead, getUserProfile } from "../utils/api"
 import { useAuth } from "../features/auth/AuthContext"
 import { usePrefetch } from "../utils/usePrefetch"
 import { useEvent, useJoinEvent, useLeaveEvent } from "../hooks/useEvents"
@@ -136,26 +136,28 @@ export default function EventDetail() {
 
     const unreadMessages = messages.filter(msg =>
       msg.user.id !== user.id &&
+      !msg.pending &&
       !msg.is_read_by_me &&
       !markedReadIdsRef.current.has(msg.id)
     )
 
     if (unreadMessages.length > 0) {
       const timeoutId = setTimeout(() => {
-        unreadMessages.forEach(msg => {
-          markedReadIdsRef.current.add(msg.id)
+        const ids = unreadMessages.map(msg => msg.id)
+        ids.forEach(msgId => markedReadIdsRef.current.add(msgId))
 
-          if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+        if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+          ids.forEach(msgId => {
             wsRef.current.send(JSON.stringify({
               type: "mark_read",
-              message_id: msg.id
+              message_id: msgId
             }))
-          } else {
-            markEventMessageRead(id, msg.id).catch(err => {
-              markedReadIdsRef.current.delete(msg.id)
-            })
-          }
-        })
+          })
+        } else {
+          markEventMessagesRead(id, ids).catch(err => {
+            ids.forEach(msgId => markedReadIdsRef.current.delete(msgId))
+          })
+        }
       }, 500)
 
       return () => clearTimeout(timeoutId)
@@ -333,6 +335,28 @@ export default function EventDetail() {
         }, 100)
         break
 
+      case "message_confirmed":
+        const confirmed = message.message
+        if (!confirmed?.id) break
+        receivedMessageIdsRef.current.add(confirmed.id)
+
+        // Swap the pending copy for the persisted message
+        queryClient.setQueryData(['events', id, 'messages'], (prevMessages = []) => {
+          if (prevMessages.some(m => m.id === confirmed.id)) {
+            return prevMessages.filter(m => m.id !== message.client_msg_id)
+          }
+          return prevMessages.map(m =>
+            m.id === message.client_msg_id ? confirmed : m
+          )
+        })
+        break
+
+      case "message_failed":
+        queryClient.setQueryData(['events', id, 'messages'], (prevMessages = []) =>
+          prevMessages.filter(m => m.id !== message.client_msg_id)
+        )
+        break
+
       case "message_deleted":
         const deletedMsgId = message.message_id
         if (deletedMsgId) {
@@ -410,26 +434,28 @@ export default function EventDetail() {
 
     const unreadMessages = messages.filter(msg =>
       msg.user.id !== user.id &&
+      !msg.pending &&
       !msg.is_read_by_me &&
       !markedReadIdsRef.current.has(msg.id)
     )
 
     if (unreadMessages.length > 0) {
       const timeoutId = setTimeout(() => {
-        unreadMessages.forEach(msg => {
-          markedReadIdsRef.current.add(msg.id)
+        const ids = unreadMessages.map(msg => msg.id)
+        ids.forEach(msgId => markedReadIdsRef.current.add(msgId))
 
-          if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+        if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+          ids.forEach(msgId => {
             wsRef.current.send(JSON.stringify({
               type: "mark_read",
-              message_id: msg.id
+              message_id: msgId
             }))
-          } else {
-            markEventMessageRead(id, msg.id).catch(err => {
-              markedReadIdsRef.current.delete(msg.id)
-            })
-          }
-        })
+          })
+        } else {
+          markEventMessagesRead(id, ids).catch(err => {
+            ids.forEach(msgId => markedReadIdsRef.current.delete(msgId))
+          })
+        }
       }, 500)
 
       return () => clearTimeout(timeoutId)
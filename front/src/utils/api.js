@@ -77,6 +77,16 @@ export async function getMyEventsCount(params = {}) {
   return data.count || 0
 }
 
+const AI_JOB_POLL_INTERVAL_MS = 1000
+
+async function waitForAiJob(jobId) {
+  while (true) {
+    const { data } = await api.get(`events/ai-jobs/${jobId}`)
+    if (data.status === "done") return data
+    await new Promise(resolve => setTimeout(resolve, AI_JOB_POLL_INTERVAL_MS))
+  }
+}
+
 export async function refineEventText(text, fieldType = "general") {
   const token = localStorage.getItem("access_token")
   
@@ -85,10 +95,11 @@ export async function refineEventText(text, fieldType = "general") {
   }
   
   try {
-    const { data } = await api.post("events/refine-text", {
+    const { data: job } = await api.post("events/refine-text", {
       text,
       field_type: fieldType
     })
+    const data = await waitForAiJob(job.job_id)
     return data.refined_text
   } catch (error) {
     if (isDev) {
@@ -108,7 +119,8 @@ export async function generateCoverImage(prompt) {
   if (token) {
     setAuthHeader(token)
   }
-  const { data } = await api.post("events/generate-image", { prompt })
+  const { data: job } = await api.post("events/generate-image", { prompt })
+  const data = await waitForAiJob(job.job_id)
   return data.image_url
 }
 export async function updateEvent(id, patch) {
@@ -244,3 +256,7 @@ export async function markEventMessageRead(eventId, messageId) {
   await api.post(`events/${eventId}/messages/${messageId}/read`)
 }
 
+export async function markEventMessagesRead(eventId, messageIds) {
+  await api.post(`events/${eventId}/messages/read`, { message_ids: messageIds })
+}
+